@@ -0,0 +1,198 @@
+"""離線批次解碼：把錄下來的 UART 原始資料一次解成欄位陣列（需要 numpy）。
+
+    python batch_decode.py capture.bin [--v2] [--csv out.csv]
+    python batch_decode.py --bench 2000000
+
+封包判斷規則跟即時的 FrameParser 一樣：header / 分隔符（v2 再加 CRC）都對才算，
+由前往後取、接受一筆就跳過整個 frame（重疊的候選位置不算）。
+
+錄下來的資料通常是整段對齊的 frame：先把它當 (n, frame_len) 的 view（不複製）
+一欄一欄檢查固定 byte / CRC，全部都對就不用再逐個找 header；有雜訊才走一般路徑。
+"""
+import argparse
+import time
+
+import numpy as np
+
+from uart_protocol import (
+    CRC16_TABLE, SCHEMA_V1, SCHEMA_V2, encode_frame, encode_frame_v2,
+)
+
+_NP_CODES = {"B": "u1", "b": "i1", "H": ">u2", "h": ">i2", "I": ">u4", "i": ">i4"}
+_CRC_TABLE = np.array(CRC16_TABLE, dtype=np.uint16)
+
+
+def _make_crc16_table2():
+    """一次吃 2 byte 的表：crc = T2[crc ^ (b0 << 8 | b1)]（CCITT 是 16-bit CRC，剛好一個 word）。"""
+    x = np.arange(0x10000, dtype=np.uint32)
+    hi = _CRC_TABLE[x >> 8].astype(np.uint32)           # 先吃高位 byte
+    return (((hi << 8) & 0xFFFF) ^ _CRC_TABLE[(hi >> 8) ^ (x & 0xFF)]).astype(np.uint16)
+
+_CRC_TABLE2 = _make_crc16_table2()
+
+
+def schema_dtype(schema):
+    """FrameSchema → numpy structured dtype（big-endian 欄位、固定 byte 當 padding）。"""
+    return np.dtype({
+        "names":    [name for name, _, _ in schema.fields],
+        "formats":  [_NP_CODES[code] for _, _, code in schema.fields],
+        "offsets":  [off for _, off, _ in schema.fields],
+        "itemsize": schema.size,
+    })
+
+
+def _crc16_rows(frames, start, end):
+    """frames：(n, frame_len) uint8（可以是 strided view），每一列算 [start, end) 的 CRC。"""
+    crc = np.full(len(frames), 0xFFFF, dtype=np.uint16)
+    col = start
+    while col + 2 <= end:
+        word = (frames[:, col].astype(np.uint16) << 8) | frames[:, col + 1]
+        crc = _CRC_TABLE2[crc ^ word]
+        col += 2
+    if col < end:
+        crc = (crc << 8) ^ _CRC_TABLE[(crc >> 8) ^ frames[:, col]]
+    return crc
+
+
+def _rows_valid(frames, schema):
+    """每一列的固定 byte（v2 再加 CRC）是不是都對。"""
+    ok = frames[:, 0] == schema.const_at[0][1]
+    for off, val in schema.const_at[1:]:
+        ok &= frames[:, off] == val
+    if schema.crc is not None:
+        start, end = schema.crc
+        at = schema.size - 2
+        want = (frames[:, at].astype(np.uint16) << 8) | frames[:, at + 1]
+        ok &= _crc16_rows(frames, start, end) == want
+    return ok
+
+
+def _drop_overlaps(pos, flen):
+    """由前往後取：接受一筆後，落在它裡面的候選位置都不算（同 FrameParser）。"""
+    if len(pos) < 2:
+        return pos
+    close = np.diff(pos) < flen
+    if not close.any():
+        return pos
+
+    # 只有彼此重疊的那幾群需要逐筆判斷
+    involved = np.zeros(len(pos), dtype=bool)
+    involved[:-1] |= close
+    involved[1:]  |= close
+    keep = ~involved
+    nxt = -1
+    for i in np.flatnonzero(involved).tolist():
+        p = int(pos[i])
+        if p >= nxt:
+            keep[i] = True
+            nxt = p + flen
+    return pos[keep]
+
+
+def find_frames(data, schema=SCHEMA_V1):
+    """回傳所有合法 frame 的起始位置（int64 陣列）。"""
+    arr  = np.frombuffer(data, dtype=np.uint8)
+    flen = schema.size
+    n    = len(arr) - flen + 1
+    if n <= 0:
+        return np.zeros(0, dtype=np.int64)
+
+    # 對齊的快速路徑：從第一個 header 起整段切成 frame，全部合法就直接回傳
+    first = data.find(bytes((schema.const_at[0][1],)))
+    if first >= 0:
+        count = (len(arr) - first) // flen
+        frames = arr[first:first + count * flen].reshape(count, flen)
+        if count and _rows_valid(frames, schema).all():
+            return first + np.arange(count, dtype=np.int64) * flen
+
+    # 先找 header，再只在候選位置檢查其它固定 byte
+    pos = np.flatnonzero(arr[:n] == schema.const_at[0][1])
+    for off, val in schema.const_at:
+        if off == 0:
+            continue
+        pos = pos[arr[pos + off] == val]
+
+    if schema.crc is not None and len(pos):
+        pos = pos[_rows_valid(arr[pos[:, None] + np.arange(flen)], schema)]
+
+    return _drop_overlaps(pos, flen)
+
+
+def decode_capture(data, schema=SCHEMA_V1):
+    """解整段資料，回傳 dict：每個欄位一個陣列，外加 'pos'。
+
+    欄位陣列直接是 record 的 view，不另外複製；多 byte 欄位維持 big-endian dtype
+    （numpy 運算會自己處理，要原生順序再 astype）。
+    """
+    dtype = schema_dtype(schema)
+    pos   = find_frames(data, schema)
+    flen  = schema.size
+
+    if len(pos) and (len(pos) == 1 or (np.diff(pos) == flen).all()):
+        # 乾淨的連續資料流：直接把 buffer 當結構陣列看，不複製
+        rec = np.frombuffer(data, dtype=dtype, count=len(pos), offset=int(pos[0]))
+    else:
+        arr = np.frombuffer(data, dtype=np.uint8)
+        rec = arr[pos[:, None] + np.arange(flen)].view(dtype).ravel()
+
+    cols = {name: rec[name] for name in dtype.names}
+    cols["pos"] = pos
+    return cols
+
+
+def seq_stats(seq):
+    """v2 序號統計（整段資料一次算）：遺失 / 重複或倒退。"""
+    d = np.diff(seq.astype(np.int64)) & 0xFFFF
+    back = (d == 0) | (d >= 0x8000)
+    return {
+        "lost":       int((d[~back] - 1).sum()),
+        "duplicated": int(back.sum()),
+    }
+
+
+def _synthetic(n, v2, block=4096):
+    rng = np.random.default_rng(1)
+    vals = [(int(rng.integers(0, 9)), int(rng.integers(0, 8000)), int(rng.integers(0, 300)),
+             int(rng.integers(0, 256)), int(rng.integers(0, 256)), int(rng.integers(-1800, 1800)))
+            for _ in range(block)]
+    if v2:
+        # 序號要連續，不能整塊重複
+        return b"".join(encode_frame_v2(i, *vals[i % block]) for i in range(n))
+    return b"".join(encode_frame(*v) for v in vals) * max(1, n // block)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="DriveSync UART capture batch decoder")
+    ap.add_argument("capture", nargs="?")
+    ap.add_argument("--v2", action="store_true", help="protocol v2 (seq + CRC)")
+    ap.add_argument("--csv", help="write decoded columns to CSV")
+    ap.add_argument("--bench", type=int, metavar="N", help="decode N synthetic frames")
+    args = ap.parse_args()
+
+    schema = SCHEMA_V2 if args.v2 else SCHEMA_V1
+    if args.bench:
+        data = _synthetic(args.bench, args.v2)
+    elif args.capture:
+        with open(args.capture, "rb") as f:
+            data = f.read()
+    else:
+        ap.error("capture file or --bench required")
+
+    t0 = time.perf_counter()
+    cols = decode_capture(data, schema)
+    dt = time.perf_counter() - t0
+
+    n = len(cols["pos"])
+    print(f"{len(data)} bytes → {n} frames in {dt * 1e3:.1f} ms "
+          f"({n / max(dt, 1e-9) / 1e6:.1f} M frames/s)")
+    if args.v2 and n:
+        print("seq:", seq_stats(cols["seq"]))
+
+    if args.csv:
+        names = [k for k in cols if k not in ("crc", "pos")]
+        np.savetxt(args.csv, np.column_stack([cols[k] for k in names]),
+                   fmt="%d", delimiter=",", header=",".join(names), comments="")
+
+
+if __name__ == "__main__":
+    main()
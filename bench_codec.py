@@ -0,0 +1,85 @@
+"""UART 解碼 micro-benchmark：舊版手寫位移 vs schema（struct.unpack_from）。
+
+    python bench_codec.py [frames]
+"""
+import itertools
+import sys
+import timeit
+
+from uart_protocol import (
+    FRAME_LEN, SCHEMA_V1, FrameParser, FrameParserV2,
+    encode_frame, encode_frame_v2,
+)
+
+
+def legacy_decode(frame):
+    # dashboard_v9 原本 process_serial() 的寫法
+    if not (
+        frame[1]  == 0x2E and
+        frame[3]  == 0x2E and
+        frame[6]  == 0x2E and
+        frame[9]  == 0x2E and
+        frame[11] == 0x2E and
+        frame[13] == 0x2E
+    ):
+        return None
+    steer_raw = (frame[14] << 8) | frame[15]
+    if steer_raw >= 0x8000:
+        steer_raw -= 0x10000
+    return (frame[2], (frame[4] << 8) | frame[5], (frame[7] << 8) | frame[8],
+            frame[10], frame[12], steer_raw)
+
+
+def schema_decode(view, valid=SCHEMA_V1.valid, unpack=SCHEMA_V1.unpack_from):
+    if not valid(view, 0):
+        return None
+    return unpack(view, 0)
+
+
+def bench(label, fn, number, per_call=1):
+    best = min(timeit.repeat(fn, number=number, repeat=5))
+    print(f"{label:<34} {best / (number * per_call) * 1e9:8.1f} ns/frame")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    frame = bytearray(encode_frame(5, 8000, 123, 200, 30, -455))
+    view  = memoryview(frame)
+    assert legacy_decode(frame) == schema_decode(view)
+
+    print(f"--- 單筆解碼（含驗證），{n} 次 ---")
+    bench("legacy: 手寫位移 + 符號處理", lambda: legacy_decode(frame), n)
+    bench("legacy: 加上 rx_buf 切片複製", lambda: legacy_decode(frame[:FRAME_LEN]), n)
+    bench("schema: valid + unpack_from", lambda: schema_decode(view), n)
+    bench("schema: unpack_from only", lambda: SCHEMA_V1.unpack_from(view, 0), n)
+
+    # 整段串流經過 parser（1024 筆一批）
+    batch = 1024
+    v1 = b"".join(encode_frame(i % 9, i % 8000, i % 300, i % 256, 0, i % 1800)
+                  for i in range(batch))
+    # v2 每批接著上一批的序號（64 批剛好繞完 16-bit），不然第二批起全部走重複的路徑
+    v2 = [
+        b"".join(encode_frame_v2(k * batch + i, i % 9, i % 8000, i % 300, i % 256, 0, i % 1800)
+                 for i in range(batch))
+        for k in range(0x10000 // batch)
+    ]
+    v2_batches = itertools.cycle(v2)
+    v2_latest = itertools.cycle(v2)
+    reps = max(1, n // batch)
+
+    print(f"--- FrameParser，每批 {batch} 筆 ---")
+    p1 = FrameParser(capacity=len(v1))
+    p2 = FrameParserV2(capacity=batch * FrameParserV2.schema.size)
+    p1_latest = FrameParser(capacity=len(v1))
+    bench("FrameParser.feed (v1)", lambda: p1.feed(v1), reps, batch)
+    bench("FrameParserV2.feed (v2, CRC)", lambda: p2.feed(next(v2_batches)), reps, batch)
+    assert p2.link.duplicated == 0 and p2.link.lost == 0
+    bench("FrameParser.feed_latest (v1)", lambda: p1_latest.feed_latest(v1), reps, batch)
+    # v2 合併掉的 frame 還是逐筆驗 CRC / 記序號
+    p2_latest = FrameParserV2(capacity=batch * FrameParserV2.schema.size)
+    bench("FrameParserV2.feed_latest (v2)", lambda: p2_latest.feed_latest(next(v2_latest)), reps, batch)
+
+
+if __name__ == "__main__":
+    main()
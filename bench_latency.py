@@ -0,0 +1,146 @@
+"""閉迴路延遲 benchmark：pty 假方向盤 → TelemetryReader → PadOutput → RecordingSink。
+
+    python bench_latency.py [--rates 250,500,1000,2000] [--duration 3] [--pad-hz 1000] [--no-render]
+
+另一個 process 在 pty 的 master 端依指定頻率寫 Car_Info_To_UART 格式的 16-byte 封包，
+throttle / brake 兩個 byte 當成 16-bit 流水號（tag），記下每筆寫出的 perf_counter_ns()；
+dashboard 這一側用真的 reader / 輸出執行緒讀 pty slave，最後用 tag 對回寫出時間，
+算出「寫進 pty → 送進手把 sink」的延遲分布，以及每種頻率下實際吃得下多少筆。
+
+預設同時在主執行緒跑一個 60 FPS 的 pygame 畫面（SDL dummy driver，不需要螢幕），
+模擬真的 dashboard 搶 GIL 的情況。
+"""
+import argparse
+import multiprocessing as mp
+import os
+import time
+import tty
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from latency_trace import LatencyTracer
+from output_sink import RecordingSink
+from pad_output import PadOutput
+from telemetry_source import PtySource
+from uart_protocol import encode_frame
+from uart_reader import TelemetryReader
+
+TAG_LIMIT = 1 << 16
+
+
+def _writer(fd, rate, count, start_ns, conn):
+    """假方向盤：在 start_ns 開始，每 1/rate 秒寫一筆，回傳每筆的寫出時間。"""
+    period = int(1e9 / rate)
+    sent = []
+    for i in range(count):
+        tag = i + 1
+        frame = encode_frame(3, 3000 + (i & 0xFFF), 120, tag >> 8, tag & 0xFF, (i % 3600) - 1800)
+        target = start_ns + i * period
+        while True:
+            now = time.perf_counter_ns()
+            if now >= target:
+                break
+            if target - now > 300_000:
+                time.sleep((target - now - 200_000) / 1e9)
+        sent.append(time.perf_counter_ns())
+        os.write(fd, frame)
+    conn.send(sent)
+    conn.close()
+
+
+def _render_load(until):
+    """主執行緒：跟 dashboard 差不多的 60 FPS 畫面負載。"""
+    import pygame
+    pygame.init()
+    screen = pygame.display.set_mode((1280, 720))
+    font = pygame.font.SysFont("Consolas", 40, bold=True)
+    clock = pygame.time.Clock()
+    frames = 0
+    while time.perf_counter() < until:
+        clock.tick(60)
+        pygame.event.pump()
+        screen.fill((4, 9, 16))
+        for i in range(12):
+            pygame.draw.rect(screen, (9, 21, 32), (40 + i * 100, 130, 90, 380), border_radius=22)
+            screen.blit(font.render(f"{frames + i:5d}", True, (235, 245, 255)), (40 + i * 100, 300))
+        pygame.display.flip()
+        frames += 1
+    pygame.quit()
+    return frames
+
+
+def _pct(sorted_vals, q):
+    return sorted_vals[min(len(sorted_vals) - 1, int(len(sorted_vals) * q / 100))]
+
+
+def run_once(rate, duration, pad_hz, render):
+    count = min(int(rate * duration), TAG_LIMIT - 1)
+    master, slave = os.openpty()
+    tty.setraw(master)
+    tty.setraw(slave)
+
+    tracer = LatencyTracer()
+    reader = TelemetryReader(PtySource(os.ttyname(slave), timeout=0.01), tracer=tracer)
+    sink = RecordingSink()
+    # watchdog 關掉：假方向盤停了以後拉回中立的那些 report 會被當成 tag
+    out = PadOutput(sink, rate_hz=pad_hz, telemetry=reader, tracer=tracer, stale_timeout=None)
+    reader.start()
+    out.start()
+    while not reader.connected:
+        time.sleep(0.001)
+
+    parent, child = mp.Pipe(duplex=False)
+    start_ns = time.perf_counter_ns() + 200_000_000
+    proc = mp.Process(target=_writer, args=(master, rate, count, start_ns, child))
+    proc.start()
+
+    until = start_ns / 1e9 + duration + 0.2
+    fps = None
+    if render:
+        t0 = time.perf_counter()
+        fps = _render_load(until) / (time.perf_counter() - t0)
+    sent = parent.recv()
+    proc.join()
+    time.sleep(0.1)   # 讓最後幾筆走完
+    out.stop()
+    reader.stop()
+    os.close(master)
+    os.close(slave)
+
+    # 每個 tag 第一次出現在 sink 的時間 - 寫出時間
+    seen = {}
+    for t_ns, _, thr, brk, _ in sink.records:
+        tag = (thr << 8) | brk
+        if tag and tag not in seen:
+            seen[tag] = t_ns
+    lat = sorted((seen[tag] - sent[tag - 1]) / 1e3 for tag in seen if tag <= len(sent))
+    span = (sent[-1] - sent[0]) / 1e9 if len(sent) > 1 else duration
+
+    print(f"--- {rate} Hz（實際寫出 {len(sent) / span:.0f} frame/s）---")
+    print(f"  written {len(sent)}, published {reader.latest[0]}, pad reports {len(sink.records)}, "
+          f"delivered {len(lat)} ({100.0 * len(lat) / max(1, len(sent)):.1f}%)")
+    if lat:
+        print(f"  pty → sink  p50 {_pct(lat, 50):.0f} us  p95 {_pct(lat, 95):.0f} us  "
+              f"p99 {_pct(lat, 99):.0f} us  max {lat[-1]:.0f} us")
+    print(f"  stages (from read): {tracer.format_report()}")
+    print(f"  sink report: {sink.latency()}")
+    if fps is not None:
+        print(f"  render: ~{fps:.0f} FPS")
+    return lat
+
+
+def main():
+    ap = argparse.ArgumentParser(description="DriveSync closed-loop latency benchmark (pty fake wheel)")
+    ap.add_argument("--rates", default="250,500,1000,2000", help="frame rates to test (Hz)")
+    ap.add_argument("--duration", type=float, default=3.0, help="seconds per rate")
+    ap.add_argument("--pad-hz", type=int, default=1000, help="PadOutput rate")
+    ap.add_argument("--no-render", action="store_true", help="skip the 60 FPS pygame load")
+    args = ap.parse_args()
+
+    for rate in (int(r) for r in args.rates.split(",")):
+        run_once(rate, args.duration, args.pad_hz, not args.no_render)
+
+
+if __name__ == "__main__":
+    main()
@@ -60,6 +60,9 @@ void SystemClock_Config(void);
 #define BRAKE_RATE      0.8f     
 #define FRICTION_RATE   0.1f     
 
+/* 1: send protocol v2 frames (seq + CRC-16); set UART_PROTOCOL = 2 on the PC side */
+#define UART_PROTOCOL_V2  0
+
 const float GEAR_MAX_SPEED[] = {0, 40, 70, 110, 150, 190, 240, 280, 320};
 
 typedef struct {
@@ -166,6 +169,49 @@ void Car_Info_To_UART(uint8_t gear, uint16_t rpm, uint16_t speed, uint8_t thrott
 		HAL_UART_Transmit(&UartHandle, &uart_buf[i], 1, 0xFFFF);
 }
 
+/* CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF) */
+static uint16_t UART_CRC16(const uint8_t *data, uint8_t len)
+{
+	uint16_t crc = 0xFFFF;
+	
+	for(uint8_t i=0; i<len; i++)
+	{
+		crc ^= (uint16_t)data[i] << 8;
+		for(uint8_t b=0; b<8; b++)
+			crc = (crc & 0x8000) ? (uint16_t)((crc << 1) ^ 0x1021) : (uint16_t)(crc << 1);
+	}
+	return crc;
+}
+
+/* Protocol v2: AB C2 seq(2) gear rpm(2) speed(2) thr brk steer(2) crc(2), CRC over bytes 1..12 */
+void Car_Info_To_UART_V2(uint8_t gear, uint16_t rpm, uint16_t speed, uint8_t throttle, uint8_t brake, int16_t steer_angle)
+{
+	static uint16_t seq = 0;
+	uint8_t uart_buf[15];
+	uint16_t crc;
+	
+	uart_buf[0] = 0xAB;
+	uart_buf[1] = 0xC2;
+	uart_buf[2] = (seq >> 8) & 0xFF;
+	uart_buf[3] = seq & 0xFF;
+	uart_buf[4] = gear & 0xFF;
+	uart_buf[5] = (rpm >> 8) & 0xFF;
+	uart_buf[6] = rpm & 0xFF;
+	uart_buf[7] = (speed >> 8) & 0xFF;
+	uart_buf[8] = speed & 0xFF;
+	uart_buf[9] = throttle & 0xFF;
+	uart_buf[10] = brake & 0xFF;
+	uart_buf[11] = (steer_angle >> 8) & 0xFF;
+	uart_buf[12] = steer_angle & 0xFF;
+	
+	crc = UART_CRC16(&uart_buf[1], 12);
+	uart_buf[13] = (crc >> 8) & 0xFF;
+	uart_buf[14] = crc & 0xFF;
+	seq++;
+	
+	HAL_UART_Transmit(&UartHandle, uart_buf, 15, 0xFFFF);
+}
+
 
 /* Private functions ---------------------------------------------------------*/
 
@@ -407,7 +453,11 @@ void Normal_Mode(void)
 					car_rpm = Get_Sim_RPM();
 					car_speed = Get_Sim_KMH();
 					
+#if UART_PROTOCOL_V2
+					Car_Info_To_UART_V2(car_gear, car_rpm, car_speed, car_throttle, car_brake, car_steer_angle);
+#else
 					Car_Info_To_UART(car_gear, car_rpm, car_speed, car_throttle, car_brake, car_steer_angle);
+#endif
 				}
 				
 				if(TAMPER != tamper_last)
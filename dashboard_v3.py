@@ -2,6 +2,8 @@ import sys, time, math, signal
 import pygame
 import vgamepad as vg
 
+from gauge_sprite import GaugeSprite
+
 # ---------- 基本初始化 ----------
 pygame.init()
 W, H = 1100, 640
@@ -55,32 +57,33 @@ GEAR_RPM_K = [0.0, 140.0, 120.0, 100.0, 90.0, 80.0, 72.0, 66.0]  # rpm 對應時
 
 # ---------- 小工具 ----------
 def clamp(x, lo, hi): return max(lo, min(hi, x))
-def draw_text(txt, f, x, y, color=FG, center=False):
+def draw_text(txt, f, x, y, color=FG, center=False, surface=None):
     surf = f.render(txt, True, color)
     rect = surf.get_rect()
     if center:
         rect.center = (x, y)
     else:
         rect.topleft = (x, y)
-    screen.blit(surf, rect)
+    (surface or screen).blit(surf, rect)
 
 def draw_rect(x,y,w,h,fill,border_color=BORDER, radius=12):
     pygame.draw.rect(screen, border_color, (x,y,w,h), border_radius=radius)
     pygame.draw.rect(screen, fill, (x+2,y+2,w-4,h-4), border_radius=radius)
 
 # ---------- 轉速錶（弧形 + 刻度 + 紅線） ----------
-def draw_tacho(cx, cy, r, rpm, gear):
+def draw_tacho_face(surf, cx, cy, r):
+    """錶面只畫一次（見 gauge_sprite）。"""
     # 背板
-    pygame.draw.circle(screen, (30,32,38), (cx,cy), r+10, width=14)
+    pygame.draw.circle(surf, (30,32,38), (cx,cy), r+10, width=14)
     # 橘色區域 0~7000
     start = math.radians(220)     # 起點角度（螢幕座標）
     end   = math.radians(-40)     # 終點
-    pygame.draw.arc(screen, AMBER, (cx-r, cy-r, 2*r, 2*r), start, end, 22)
+    pygame.draw.arc(surf, AMBER, (cx-r, cy-r, 2*r, 2*r), start, end, 22)
 
     # 紅線區域 7000~8000
     red_s = math.radians(220 + (7000/8000.0)*260)
     red_e = math.radians(220 + (8000/8000.0)*260)
-    pygame.draw.arc(screen, RED, (cx-r, cy-r, 2*r, 2*r), red_s, red_e, 24)
+    pygame.draw.arc(surf, RED, (cx-r, cy-r, 2*r, 2*r), red_s, red_e, 24)
 
     # 刻度與數字 0~8
     for i in range(0, 9):
@@ -89,19 +92,21 @@ def draw_tacho(cx, cy, r, rpm, gear):
         y1 = cy + int((r-8) * math.sin(a))
         x2 = cx + int((r-36) * math.cos(a))
         y2 = cy + int((r-36) * math.sin(a))
-        pygame.draw.line(screen, FG if i%1==0 else SUB, (x1,y1), (x2,y2), 2)
+        pygame.draw.line(surf, FG if i%1==0 else SUB, (x1,y1), (x2,y2), 2)
         if i>0:
             lx = cx + int((r-58) * math.cos(a))
             ly = cy + int((r-58) * math.sin(a))
-            draw_text(str(i), font_md, lx-8, ly-12, FG)
+            draw_text(str(i), font_md, lx-8, ly-12, FG, surface=surf)
+
+tacho = None
+
+def draw_tacho(cx, cy, r, rpm, gear):
+    global tacho
+    if tacho is None or tacho.r != r:
+        tacho = GaugeSprite(r, 220, 260, 8000, draw_tacho_face, BG, needle_color=ACCENT)
 
-    # 指針 (rpm 0..8000 -> 角度 220°..-40°)
-    ratio = clamp(rpm, 0, 8000) / 8000.0
-    ang   = math.radians(220 + ratio*260)
-    x = cx + int((r-70) * math.cos(ang))
-    y = cy + int((r-70) * math.sin(ang))
-    pygame.draw.line(screen, ACCENT, (cx,cy), (x,y), 8)
-    pygame.draw.circle(screen, (240,240,240), (cx,cy), 10)
+    # 錶面 + 指針 (rpm 0..8000 -> 角度 220°..-40°)
+    tacho.draw(screen, cx, cy, rpm)
 
     # 中央區塊：檔位、轉速
     draw_text(str(gear if gear>0 else 0), font_xl, cx, cy-34, FG, center=True)
@@ -187,12 +192,12 @@ while True:
 
     # ---------- 繪圖 ----------
     screen.fill(BG)
+    # 轉速錶（中央）；錶面是不透明的方塊，先畫，標題才不會被蓋到
+    draw_tacho(W//2, 290, 210, rpm, gear)
+
     # 標題列
     draw_text("DriveSync Telemetry HUD", font_lg, 22, 16, ACCENT)
 
-    # 轉速錶（中央）
-    draw_tacho(W//2, 290, 210, rpm, gear)
-
     # 中下資訊（Lap/Delta/Mode）
     mm = lap_ms//60000; ss = (lap_ms//1000)%60; ms = (lap_ms%1000)//10
     draw_text(f"{mm}:{ss:02d}.{ms:02d}", font_lg, W//2-70, 520, FG)
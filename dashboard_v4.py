@@ -2,6 +2,8 @@ import sys, math, signal
 import pygame
 import vgamepad as vg
 
+from gauge_sprite import GaugeSprite
+
 # ----------------- 初始化 -----------------
 pygame.init()
 W, H = 1200, 650
@@ -53,49 +55,53 @@ GEAR_RPM_K = [0.0,140.0,120.0,100.0, 90.0,80.0,72.0,66.0]
 def clamp(x, lo, hi): return max(lo, min(hi, x))
 
 # ----------------- 小工具 -----------------
-def draw_text(txt, f, x, y, color=FG, center=False):
+def draw_text(txt, f, x, y, color=FG, center=False, surface=None):
     surf = f.render(txt, True, color)
     rect = surf.get_rect()
     if center:
         rect.center = (x, y)
     else:
         rect.topleft = (x, y)
-    screen.blit(surf, rect)
+    (surface or screen).blit(surf, rect)
 
 def draw_rect(x,y,w,h,fill,border_color=BORDER, radius=12):
     pygame.draw.rect(screen, border_color, (x,y,w,h), border_radius=radius)
     pygame.draw.rect(screen, fill, (x+2,y+2,w-4,h-4), border_radius=radius)
 
 # ----------------- 速度表（中間大顆） -----------------
-def draw_speed_gauge(cx, cy, r, speed):
+MAX_SPD = 260
+
+def draw_speed_face(surf, cx, cy, r):
+    """錶面只畫一次（見 gauge_sprite）。"""
     # 半圓背景
-    pygame.draw.circle(screen, (30,32,38), (cx,cy), r+10, width=14)
+    pygame.draw.circle(surf, (30,32,38), (cx,cy), r+10, width=14)
     start = math.radians(210)   # 左邊
     end   = math.radians(-30)   # 右邊
-    pygame.draw.arc(screen, AMBER, (cx-r, cy-r, 2*r, 2*r), start, end, 26)
+    pygame.draw.arc(surf, AMBER, (cx-r, cy-r, 2*r, 2*r), start, end, 26)
 
     # 刻度 0~260 km/h
-    max_spd = 260
     step = 20
-    for v in range(0, max_spd+1, step):
-        ang = math.radians(210 + (v/max_spd)*240)
+    for v in range(0, MAX_SPD+1, step):
+        ang = math.radians(210 + (v/MAX_SPD)*240)
         x1 = cx + int((r-8) * math.cos(ang))
         y1 = cy + int((r-8) * math.sin(ang))
         x2 = cx + int((r-36) * math.cos(ang))
         y2 = cy + int((r-36) * math.sin(ang))
-        pygame.draw.line(screen, FG if v%40==0 else SUB, (x1,y1), (x2,y2), 2)
+        pygame.draw.line(surf, FG if v%40==0 else SUB, (x1,y1), (x2,y2), 2)
         if v % 40 == 0:
             lx = cx + int((r-60) * math.cos(ang))
             ly = cy + int((r-60) * math.sin(ang))
-            draw_text(str(v//10), font_sm, lx-8, ly-8, FG)
+            draw_text(str(v//10), font_sm, lx-8, ly-8, FG, surface=surf)
+
+speed_gauge = None
+
+def draw_speed_gauge(cx, cy, r, speed):
+    global speed_gauge
+    if speed_gauge is None or speed_gauge.r != r:
+        speed_gauge = GaugeSprite(r, 210, 240, MAX_SPD, draw_speed_face, BG, needle_color=ACCENT)
 
-    # 指針
-    spd_clamp = clamp(speed, 0, max_spd)
-    ang = math.radians(210 + (spd_clamp/max_spd)*240)
-    px = cx + int((r-70) * math.cos(ang))
-    py = cy + int((r-70) * math.sin(ang))
-    pygame.draw.line(screen, ACCENT, (cx,cy), (px,py), 8)
-    pygame.draw.circle(screen, (240,240,240), (cx,cy), 10)
+    # 錶面 + 指針
+    speed_gauge.draw(screen, cx, cy, speed)
 
     # 中央：數字速度
     draw_text(str(int(speed)), font_xl, cx, cy-35, FG, center=True)
@@ -103,16 +109,16 @@ def draw_speed_gauge(cx, cy, r, speed):
     draw_text("Speed", font_sm, cx, cy+30, SUB, center=True)
 
 # ----------------- 轉速表（右側縮小） -----------------
-def draw_tacho_small(cx, cy, r, rpm, gear):
+def draw_tacho_face(surf, cx, cy, r):
     # 背景弧 0~8000
-    pygame.draw.circle(screen, (30,32,38), (cx,cy), r+6, width=10)
+    pygame.draw.circle(surf, (30,32,38), (cx,cy), r+6, width=10)
     start = math.radians(210)
     end   = math.radians(-30)
-    pygame.draw.arc(screen, AMBER, (cx-r, cy-r, 2*r, 2*r), start, end, 18)
+    pygame.draw.arc(surf, AMBER, (cx-r, cy-r, 2*r, 2*r), start, end, 18)
 
     red_s = math.radians(210 + (7000/8000.0)*240)
     red_e = math.radians(210 + (8000/8000.0)*240)
-    pygame.draw.arc(screen, RED, (cx-r, cy-r, 2*r, 2*r), red_s, red_e, 20)
+    pygame.draw.arc(surf, RED, (cx-r, cy-r, 2*r, 2*r), red_s, red_e, 20)
 
     for i in range(0,9):
         ang = math.radians(210 + (i/8)*240)
@@ -120,15 +126,18 @@ def draw_tacho_small(cx, cy, r, rpm, gear):
         y1 = cy + int((r-6) * math.sin(ang))
         x2 = cx + int((r-22)* math.cos(ang))
         y2 = cy + int((r-22)* math.sin(ang))
-        pygame.draw.line(screen, FG if i%2==0 else SUB, (x1,y1), (x2,y2), 2)
-
-    # 指針
-    ratio = clamp(rpm,0,8000)/8000.0
-    ang = math.radians(210 + ratio*240)
-    px = cx + int((r-35) * math.cos(ang))
-    py = cy + int((r-35) * math.sin(ang))
-    pygame.draw.line(screen, ACCENT, (cx,cy), (px,py), 6)
-    pygame.draw.circle(screen, (240,240,240), (cx,cy), 8)
+        pygame.draw.line(surf, FG if i%2==0 else SUB, (x1,y1), (x2,y2), 2)
+
+tacho_small = None
+
+def draw_tacho_small(cx, cy, r, rpm, gear):
+    global tacho_small
+    if tacho_small is None or tacho_small.r != r:
+        tacho_small = GaugeSprite(r, 210, 240, 8000, draw_tacho_face, BG, pad=8,
+                                  needle_len=r-35, needle_w=6, needle_color=ACCENT, hub_r=8)
+
+    # 錶面 + 指針
+    tacho_small.draw(screen, cx, cy, rpm)
     draw_text(f"{int(rpm):d} RPM", font_sm, cx-55, cy+34, FG)
     draw_text(f"G{gear if gear>0 else 0}", font_sm, cx+36, cy-40, ACCENT)
 
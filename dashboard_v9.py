@@ -1,42 +1,72 @@
 import sys, math, signal, time, struct
 import pygame
-import vgamepad as vg
 
-SERIAL_PORT = "COM8"
+from telemetry_source import make_source
+from output_sink import BUTTON_A, BUTTON_B, BUTTON_X, NullSink, make_sink
+from dirty_rects import DirtyRegions
+from ffb_channel import CommandWriter, shift_light_mask
+from glyph_atlas import atlas_for
+from latency_trace import LatencyTracer
+from pad_output import PadOutput
+from response_curve import ResponseCurves
+from smoothing import TelemetrySmoother
+from telemetry_merge import TelemetryMerger
+from telemetry_state import TelemetryState
+from uart_protocol import FIELDS
+
+# 遙測來源：COM8 / /dev/ttyUSB0 / auto / pty:/dev/pts/3 / tcp://host:9000 / udp://:9000 / file:xxx.bin
+# 可用命令列覆寫：python dashboard_v9.py auto（探測所有串列埠，挑有在送封包的那個；
+# 會短暫打開機器上每個 port，所以不是預設）
+# 方向盤 / 踏板 / 排檔桿分開接時給多個來源並指定各自負責的欄位（見 telemetry_merge）：
+#   python dashboard_v9.py COM8=steer COM9=throttle,brake COM10=gear
+SERIAL_PORTS = sys.argv[1:] or ["COM8"]
 BAUD_RATE   = 115200
+RENDER_FPS  = 60      # 120 / 144 Hz 螢幕可以調高，建議同時開 SMOOTHING
+SMOOTHING   = False   # True：畫面上的方向 / 速度 / 轉速 / 踏板內插到畫面時間點（不影響手把輸出）
+DIRTY_UPDATE = True   # 只把有變的卡片送上螢幕（display.update(rects)）；False：每幀整張 flip()
+UART_DEBUG  = False   # True：每解出一筆就 print（高頻率時會拖慢讀取）
+UART_COALESCE = True  # 一次收到多筆時只解最新一筆（卡頓後不會一路補舊資料）
+UART_PROTOCOL = 1     # 2：韌體開 UART_PROTOCOL_V2（序號 + CRC，可統計掉包）
+LATENCY_TRACE = False # True：每秒印出 UART → 解碼 / 發布 / 手把 / 畫面 的 p50/p95/p99 延遲
+UART_TIMING   = False # True：每秒印出 MCU 實際送出頻率 / 抖動 / 一次到幾筆（見 FrameCadence）
+PAD_RATE_HZ = 500     # 虛擬手把更新頻率（250 / 500 / 1000），跟畫面 FPS 無關
+PAD_ON_TELEMETRY = True  # 收到新遙測立刻送出，不等下一個 tick
+FFB_ENABLED = False   # 遊戲震動 / 換檔燈回傳給方向盤 MCU（走第一個可寫的遙測來源）；韌體還沒解 0xAD 指令前先關著
+SHIFT_LIGHT_RPM = (6000, 9000)   # 換檔燈：第一顆亮 / 全亮的轉速
+SHIFT_LIGHT_LEDS = 10
+PAD_STALE_MS = 50     # 遙測超過這麼久沒新 frame 就把手把拉回中立（watchdog）
+PAD_NEUTRAL_RAMP_MS = 150
+PAD_OUTPUT  = "auto"  # auto / vgamepad / uinput / null / record:pad.csv（見 output_sink）
+# 反應曲線（見 response_curve）：deadzone / saturation / exponent / points=[(x, y), ...]
+STEER_CURVE    = {"deadzone": 0.0, "exponent": 1.0}
+THROTTLE_CURVE = {"deadzone": 0.0, "exponent": 1.0}
+BRAKE_CURVE    = {"deadzone": 0.0, "exponent": 1.0}
+
+USE_SERIAL = False   # 目前是否由 UART 供資料（斷線時自動退回鍵盤模式）
+reader = None        # TelemetryMerger：一個或多個來源合併後的遙測
+tracer = LatencyTracer() if LATENCY_TRACE else None
 
 try:
-    import serial
+    # 開 port / 讀取 / 解碼 / 斷線重連都在背景執行緒（每個來源一條），不跟 60 FPS 的畫面綁在一起
+    reader = TelemetryMerger.from_specs(
+        SERIAL_PORTS,
+        lambda spec: make_source(spec, BAUD_RATE, protocol=UART_PROTOCOL),
+        verbose=UART_DEBUG, coalesce=UART_COALESCE, protocol=UART_PROTOCOL, tracer=tracer,
+    )
+    for r in reader.readers:
+        print(f"[UART] Using {r.source.name}")
+    reader.start()
 except ImportError:
-    serial = None
-
-USE_SERIAL = False
-ser = None
-rx_buf = bytearray()
-
-if serial is not None:
-    try:
-        ser = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=0.01)
-        USE_SERIAL = True
-        print(f"[UART] Using {SERIAL_PORT} @ {BAUD_RATE}")
-    except Exception as e:
-        print("[UART] Disabled:", e)
-        ser = None
-        USE_SERIAL = False
-else:
     print("[UART] pyserial not installed, run: pip install pyserial")
-    ser = None
-    USE_SERIAL = False
+except Exception as e:
+    print("[UART] Disabled:", e)
 
-# vGamepad 初始化
 pygame.init()
 W, H = 1280, 720
 screen = pygame.display.set_mode((W, H))
 pygame.display.set_caption("DriveSync Dashboard")
 clock = pygame.time.Clock()
 
-glow_surface = pygame.Surface((W, H), pygame.SRCALPHA)
-
 font_title = pygame.font.SysFont("Consolas", 46, bold=True)
 font_big   = pygame.font.SysFont("Consolas", 90, bold=True)
 font_mid   = pygame.font.SysFont("Consolas", 40, bold=True)
@@ -57,14 +87,44 @@ THR_COL     = (50, 220, 140)
 BRK_COL     = (240, 90, 90)
 BAR_BG      = (12, 35, 55)
 
-pad = vg.VX360Gamepad()
+# 虛擬手把初始化（Windows：vgamepad，Linux：uinput）
+try:
+    pad_sink = make_sink(PAD_OUTPUT)
+except Exception as e:
+    print(f"[PAD] {PAD_OUTPUT} unavailable ({e}), output disabled")
+    pad_sink = NullSink()
+print(f"[PAD] Output: {pad_sink.name}")
+# 所有 sink 呼叫都在輸出執行緒裡，主迴圈只交狀態給它
+pad_out = PadOutput(pad_sink, rate_hz=PAD_RATE_HZ, telemetry=reader, wake_on_data=PAD_ON_TELEMETRY,
+                    curves=ResponseCurves(STEER_CURVE, THROTTLE_CURVE, BRAKE_CURVE),
+                    tracer=tracer, stale_timeout=PAD_STALE_MS / 1000.0,
+                    ramp=PAD_NEUTRAL_RAMP_MS / 1000.0)
+pad_out.start()
+
+# 回傳通道：震動 / 換檔燈寫回方向盤（不會卡主迴圈，過時的指令直接合併掉）
+ffb = None
+if FFB_ENABLED and reader is not None:
+    # file: 回放、tcp / udp relay 都寫不回 MCU，不用開
+    ffb_source = next((rd.source for rd in reader.readers if rd.source.writable), None)
+    if ffb_source is None:
+        print("[FFB] no writable telemetry source, command channel disabled")
+    else:
+        ffb = CommandWriter(ffb_source)
+        ffb.start()
+        pad_sink.set_feedback(ffb.rumble)
 
 def cleanup(*_):
     try:
-        pad.reset()
-        pad.update()
-        if ser is not None:
-            ser.close()
+        pad_out.stop()   # 執行緒結束前會 reset 手把
+        if ffb is not None:
+            ffb.stop()
+            print("[FFB] stats:", ffb.stats())
+        print("[PAD] latency:", pad_sink.latency())
+        pad_sink.close()
+        if reader is not None:
+            reader.stop()
+            for name, st in reader.stats().items():
+                print(f"[UART] {name} stats:", st)
     finally:
         pygame.quit()
         sys.exit(0)
@@ -73,13 +133,11 @@ signal.signal(signal.SIGINT, cleanup)
 signal.signal(signal.SIGTERM, cleanup)
 
 # --------- 狀態變數 ---------
-steer_norm = 0.0   # -1..1
-throttle   = 0     # 0..255
-brake      = 0     # 0..255
-gear       = 1
-rpm        = 900
-speed_kmh  = 0.0
-temp_c     = 83.0
+# 主迴圈（UART / 鍵盤物理）改 tel 的欄位，每幀 publish() 一次；畫面只讀發布出來的 snap
+tel  = TelemetryState()
+snap = tel.front
+pad_ver = 0   # 上一次交給手把輸出的 snap.version
+led_ver = 0   # 上一次算換檔燈的 snap.version
 
 left_held  = False
 right_held = False
@@ -91,98 +149,63 @@ lap_start  = start_time
 last_lap   = 0.0
 best_lap   = 0.0
 lap_count  = 0
+link_report_t = start_time
+trace_report_t = start_time
 
 def clamp(x, lo, hi):
     return max(lo, min(hi, x))
 
-# UART 封包
-# 0xAB, gear(1B), rpm(2B), speed(2B), thr(1B), brk(1B), steer*10(2B)
-# Little-endian: <B B H H B B h  (總長 10 bytes)
-"""
-Byte0 : 0xAB       (Header)
-Byte1 : Gearbox    (1B)
-Byte2 : RPM Low    (RPM = uint16)
-Byte3 : RPM High
-Byte4 : Speed Low  (Speed = uint16)
-Byte5 : Speed High
-Byte6 : Throttle   (0 – 255)
-Byte7 : Brake      (0 – 255)
-Byte8 : Steering Low   (int16 = real_angle * 10)
-Byte9 : Steering High
-"""
-
-FRAME_LEN = 16
+uart_seq = 0   # 上一次套用的 reader.latest 序號
+# 遙測 tuple 裡各欄位的位置（韌體加通道不會影響這裡）
+I_GEAR, I_RPM, I_SPEED, I_THR, I_BRK, I_STEER = (
+    FIELDS.index(n) for n in ("gear", "rpm", "speed", "throttle", "brake", "steer_x10"))
+# SMOOTHING：記 (steer_norm, speed, rpm, throttle, brake)，每幀內插出要畫的值
+smoother = TelemetrySmoother() if SMOOTHING else None
+flip_t_read = 0   # LATENCY_TRACE：這一幀顯示的那筆資料是什麼時候讀進來的
 
 def process_serial():
-    """讀取 UART 並解碼到全域變數（AB . gear . rpm . speed . thr . brk . steer）。"""
-    global rx_buf, gear, rpm, speed_kmh, throttle, brake, steer_norm
+    """把背景執行緒解出的最新一筆寫進 tel（不讀 UART、不會卡畫面）。"""
+    global uart_seq, flip_t_read
 
-    if not USE_SERIAL or ser is None:
+    if reader is None:
         return
 
-    data = ser.read(64)
-    if not data:
+    seq, values = reader.latest
+    if seq == uart_seq or values is None:
         return
-
-    rx_buf.extend(data)
-
-    while len(rx_buf) >= FRAME_LEN:
-        # 尋找封包開頭 0xAB
-        if rx_buf[0] != 0xAB:
-            rx_buf.pop(0)
-            continue
-
-        if len(rx_buf) < FRAME_LEN:
-            # 不夠一個完整封包，等下次再解
-            break
-
-        frame = rx_buf[:FRAME_LEN]
-        rx_buf = rx_buf[FRAME_LEN:]
-
-        # 確認 '.' 分隔符的位置都正確（防止不同步）
-        if not (
-            frame[1]  == 0x2E and
-            frame[3]  == 0x2E and
-            frame[6]  == 0x2E and
-            frame[9]  == 0x2E and
-            frame[11] == 0x2E and
-            frame[13] == 0x2E
-        ):
-            # 封包壞掉，丟掉這個 header 繼續找下一個
-            print("分隔符錯誤，丟棄一個 byte 重新同步")
-            continue
-
-        # ---- 依照實際排列解碼（16 bits 一律 big-endian：Hi 在前）----
-        gear_val   = frame[2]
-
-        rpm_val    = (frame[4]  << 8) | frame[5]      # 0x1F40 = 8000
-        speed_val  = (frame[7]  << 8) | frame[8]
-        thr_val    = frame[10]
-        brk_val    = frame[12]
-        steer_raw  = (frame[14] << 8) | frame[15]     # int16 (*10)
-
-        # int16 符號處理
-        if steer_raw >= 0x8000:
-            steer_raw -= 0x10000
-
-        # ---- 更新全域變數 ----
-        gear      = int(gear_val)
-        rpm       = int(rpm_val)
-        speed_kmh = float(speed_val)
-        throttle  = int(thr_val)
-        brake     = int(brk_val)
-
-        steer_angle = steer_raw / 10.0
-        steer_norm  = clamp(steer_angle / 180.0, -1.0, 1.0)
-
-        # Debug：先確認是否有正確解析（你現在最關心的 gear=5, rpm=8000）
-        print(
-            f"解析成功 → gear={gear}, rpm={rpm}, "
-            f"speed={speed_kmh}, thr={throttle}, brk={brake}, steer={steer_angle}"
-        )
+    uart_seq = seq
+    if tracer is not None:
+        trace = reader.trace
+        if trace[0] == seq:
+            flip_t_read = trace[1]
+
+    # ---- 更新狀態 ----
+    tel.gear      = int(values[I_GEAR])
+    tel.rpm       = int(values[I_RPM])
+    tel.speed_kmh = float(values[I_SPEED])
+    tel.throttle  = int(values[I_THR])
+    tel.brake     = int(values[I_BRK])
+
+    steer_angle = values[I_STEER] / 10.0
+    tel.steer_norm = clamp(steer_angle / 180.0, -1.0, 1.0)
+
+    if smoother is not None:
+        smoother.push(reader.newest_t, (tel.steer_norm, tel.speed_kmh, tel.rpm, tel.throttle, tel.brake))
+
+def apply_smoothing():
+    """把 tel 裡的顯示值換成內插到現在的值（UART 模式才做）。"""
+    s = smoother.sample(time.perf_counter())
+    if s is None:
+        return
+    steer, speed, rpm_val, thr, brk = s
+    tel.steer_norm = clamp(steer, -1.0, 1.0)
+    tel.speed_kmh  = max(0.0, speed)
+    tel.rpm        = max(0.0, rpm_val)
+    tel.throttle   = int(clamp(round(thr), 0, 255))
+    tel.brake      = int(clamp(round(brk), 0, 255))
 
 # UI
-def draw_text(txt, font, x, y, color=TEXT_MAIN, center=False, align_right=False):
+def draw_text(txt, font, x, y, color=TEXT_MAIN, center=False, align_right=False, surface=None):
     surf = font.render(txt, True, color)
     rect = surf.get_rect()
     if center:
@@ -191,12 +214,16 @@ def draw_text(txt, font, x, y, color=TEXT_MAIN, center=False, align_right=False)
         rect.topright = (x, y)
     else:
         rect.topleft = (x, y)
-    screen.blit(surf, rect)
+    (surface or screen).blit(surf, rect)
+
+def draw_value(txt, font, x, y, color=TEXT_MAIN, center=False, align_right=False):
+    """每幀都在變的讀數：用快取好的字元拼（見 glyph_atlas），不重新 font.render()。"""
+    atlas_for(font, color).draw(screen, txt, x, y, center=center, align_right=align_right)
 
 def fill_round_rect(surface, rect, color, radius):
     pygame.draw.rect(surface, color, rect, border_radius=radius)
 
-def draw_card(rect, bg=None, border_color=None, radius=None, border_width=2):
+def draw_card(rect, bg=None, border_color=None, radius=None, border_width=2, surface=None):
     x, y, w, h = rect
     if radius is None:
         radius = min(int(min(w, h) * 0.25), 40)
@@ -205,8 +232,9 @@ def draw_card(rect, bg=None, border_color=None, radius=None, border_width=2):
     if border_color is None:
         border_color = CARD_BORDER
 
-    pygame.draw.rect(screen, bg, rect, border_radius=radius)
-    pygame.draw.rect(screen, border_color, rect, width=border_width, border_radius=radius)
+    surface = surface or screen
+    pygame.draw.rect(surface, bg, rect, border_radius=radius)
+    pygame.draw.rect(surface, border_color, rect, width=border_width, border_radius=radius)
 
 def fmt_time(sec):
     m = int(sec // 60)
@@ -214,164 +242,202 @@ def fmt_time(sec):
     ms = int((sec * 1000) % 1000)
     return f"{m:01d}:{s:02d}.{ms//10:02d}"
 
+# --------- 版面（靜態層跟動態層共用） ---------
+TOP_BAR     = (W//2 - 240, 42, 480, 54)
+LEFT_CARD   = (40, 130, 360, 380)
+CENTER_CARD = (460, 130, 360, 380)
+RIGHT_CARD  = (880, 130, 360, 380)
+PEDAL_W, PEDAL_H = 70, 240
+LAP_ROWS    = (("CURRENT", CYAN), ("LAST", YELLOW), ("BEST", PINK))
+LAP_ROW_H   = 90
+STRIP_TITLES = ("STEER", "THR %", "BRK %", "TEMP", "LAP", "MODE")
+STRIP_W, STRIP_H, STRIP_GAP = 180, 64, 12
+
+def pedal_track(i):
+    """踏板軌道 (x, y)：0 = 油門、1 = 煞車。"""
+    x, y, w, h = LEFT_CARD
+    return x + (70, 210)[i], y + 70
+
+def strip_rect(i):
+    return (40 + i * (STRIP_W + STRIP_GAP), H - STRIP_H - 22, STRIP_W, STRIP_H)
+
+GLOW_PAD = 6   # 外圈線寬 10，往卡片外多留一點
+_glow_rings = {}
+
+def glow_ring(rect):
+    """整圈速度光暈先畫在卡片大小的 surface 上，同一個 rect 只畫一次。"""
+    ring = _glow_rings.get(rect)
+    if ring is None:
+        x, y, w, h = rect
+        p = GLOW_PAD
+        ring = pygame.Surface((w + 2*p, h + 2*p), pygame.SRCALPHA)
+        pts = [(p, p+h), (p, p), (p+w, p), (p+w, p+h), (p, p+h)]
+        inner_color = (CARD_BORDER[0], CARD_BORDER[1], CARD_BORDER[2], 210)
+        outer_color = (CARD_BORDER[0], CARD_BORDER[1], CARD_BORDER[2], 80)
+        pygame.draw.lines(ring, inner_color, False, pts, 4)
+        pygame.draw.lines(ring, outer_color, False, pts, 10)
+        ring = _glow_rings[rect] = ring.convert_alpha()
+    return ring
+
 def draw_speed_glow(rect, progress):
+    """從左下角順時針亮到 progress：每一條邊各從 ring 切一塊 blit 上去，最多四小塊。"""
     x, y, w, h = rect
-    progress = clamp(progress, 0.0, 1.0)
+    p = GLOW_PAD
+    ring = glow_ring(rect)
+    L = int(2 * (w + h) * clamp(progress, 0.0, 1.0))   # 以像素為單位，畫面 key 也用它
 
-    glow_surface.fill((0, 0, 0, 0))
-
-    perim = 2 * (w + h)
-    L = perim * progress
-
-    pts = []
-    cx, cy = x, y + h
-    pts.append((cx, cy))
-
-    segments = [
-        (h,  0, -1),
-        (w,  1,  0),
-        (h,  0,  1),
-        (w, -1,  0),
-    ]
-
-    for seg_len, dx, dy in segments:
+    sx, sy = p, p + h
+    for seg_len, dx, dy in ((h, 0, -1), (w, 1, 0), (h, 0, 1), (w, -1, 0)):
         if L <= 0:
             break
-        draw_len = min(seg_len, L)
-        ex = cx + dx * draw_len
-        ey = cy + dy * draw_len
-        pts.append((ex, ey))
-        cx, cy = ex, ey
-        L -= draw_len
-
-    if len(pts) >= 2:
-        inner_color = (CARD_BORDER[0], CARD_BORDER[1], CARD_BORDER[2], 210)
-        outer_color = (CARD_BORDER[0], CARD_BORDER[1], CARD_BORDER[2], 80)
-
-        pygame.draw.lines(glow_surface, inner_color, False, pts, 4)
-        pygame.draw.lines(glow_surface, outer_color, False, pts, 10)
-
-        screen.blit(glow_surface, (0, 0))
-
-# UI
+        d = min(seg_len, L)
+        # 整段畫完就連轉角一起露出來
+        reach = d + p if d == seg_len else d
+        ex, ey = sx + dx * reach, sy + dy * reach
+        area = pygame.Rect(min(sx, ex) - p * abs(dy), min(sy, ey) - p * abs(dx),
+                           abs(ex - sx) + 2 * p * abs(dy), abs(ey - sy) + 2 * p * abs(dx))
+        screen.blit(ring, (x - p + area.x, y - p + area.y), area)
+        sx, sy = sx + dx * d, sy + dy * d
+        L -= d
+
+background = None
+dirty = DirtyRegions(screen)
+
+def build_background():
+    """不會變的東西（底色、卡片、框線、軌道、固定標籤）畫一次，之後每幀整張 blit。
+    改主題色或視窗大小後再呼叫一次。"""
+    global background
+    bg = pygame.Surface(screen.get_size()).convert()
+    bg.fill(BG)
+
+    draw_text("bullshit", font_title, 40, 24, CYAN, surface=bg)
+
+    # 方向盤 pill
+    x, y, w, h = TOP_BAR
+    pill_radius = h // 2
+    draw_card(TOP_BAR, bg=(6, 24, 24), radius=pill_radius, border_width=2, surface=bg)
+    fill_round_rect(bg, (x+4, y+4, w-8, h-8), (5, 60, 40), pill_radius-4)
+    pygame.draw.rect(bg, (0,0,0), (x+16, y+h//2-2, w-32, 4), border_radius=2)
+    pygame.draw.line(bg, (0,0,0), (x+w//2, y+8), (x+w//2, y+h-8), 2)
+    draw_text("STEER", font_tiny, x+18, y+10, TEXT_SUB, surface=bg)
+
+    # 踏板
+    draw_card(LEFT_CARD, bg=CARD_BG_SOFT, surface=bg)
+    x, y, w, h = LEFT_CARD
+    draw_text("PEDALS / TEMP", font_sm, x+80, y+30, TEXT_SUB, surface=bg)
+    for i, label in enumerate(("THR", "BRK")):
+        tx, ty = pedal_track(i)
+        fill_round_rect(bg, (tx, ty, PEDAL_W, PEDAL_H), BAR_BG, 18)
+        draw_text(label, font_tiny, tx+PEDAL_W//2, ty+PEDAL_H+6, TEXT_SUB, center=True, surface=bg)
+
+    # 檔位 / 轉速 / 速度
+    draw_card(CENTER_CARD, bg=CARD_BG_SOFT, surface=bg)
+    x, y, w, h = CENTER_CARD
+    draw_text("RPM",  font_sm, x+w//2, y+245, TEXT_SUB, center=True, surface=bg)
+    draw_text("km/h", font_sm, x+w//2, y+335, TEXT_SUB, center=True, surface=bg)
+
+    # 圈速
+    draw_card(RIGHT_CARD, bg=CARD_BG_SOFT, surface=bg)
+    x, y, w, h = RIGHT_CARD
+    draw_text("LAP TIMES", font_sm, x+w//2, y+45, TEXT_SUB, center=True, surface=bg)
+    for i, (label, _) in enumerate(LAP_ROWS):
+        draw_text(label, font_tiny, x + 26, y + 90 + i * LAP_ROW_H, TEXT_SUB, surface=bg)
+
+    # 底部 pill
+    for i, title in enumerate(STRIP_TITLES):
+        rect = strip_rect(i)
+        draw_card(rect, bg=(9, 21, 32), radius=STRIP_H // 2, surface=bg)
+        draw_text(title, font_tiny, rect[0] + STRIP_W / 2, rect[1] + STRIP_H * 0.30,
+                  TEXT_SUB, center=True, surface=bg)
+
+    background = bg
+    dirty.set_background(bg)
+
+# UI（每幀只畫會變的部分，疊在 background 上）
+# 每個區塊先算出要畫的東西當 key，跟上一幀一樣就不畫也不送上螢幕（見 dirty_rects）
 def draw_top():
-    draw_text("bullshit", font_title, 40, 24, CYAN)
-
-    bar_w, bar_h = 480, 54
-    bar_rect = (W//2 - bar_w//2, 42, bar_w, bar_h)
-    pill_radius = bar_h // 2
-
-    draw_card(bar_rect, bg=(6, 24, 24), radius=pill_radius, border_width=2)
+    x, y, w, h = TOP_BAR
+    pill_radius = h // 2
 
-    x, y, w, h = bar_rect
-    inner = (x+4, y+4, w-8, h-8)
-    fill_round_rect(screen, inner, (5, 60, 40), pill_radius-4)
-
-    pygame.draw.rect(screen, (0,0,0), (x+16, y+h//2-2, w-32, 4), border_radius=2)
-    pygame.draw.line(screen, (0,0,0), (x+w//2, y+8), (x+w//2, y+h-8), 2)
-
-    norm = clamp(steer_norm, -1.0, 1.0)
+    norm = clamp(snap.steer_norm, -1.0, 1.0)
     cx = x + w//2 + int(norm * (w//2 - 60))
+    txt = f"{norm:+0.3f}"
+    if not dirty.region("top", TOP_BAR, (cx, txt)):
+        return
     knob = (cx-18, y+10, 36, h-20)
     fill_round_rect(screen, knob, GREEN_BAR, pill_radius-10)
 
-    draw_text("STEER", font_tiny, x+18, y+10, TEXT_SUB)
-    draw_text(f"{norm:+0.3f}", font_sm, x+18, y+24, TEXT_MAIN)
+    draw_value(txt, font_sm, x+18, y+24, TEXT_MAIN)
 
 def draw_left_panel():
-    card_rect = (40, 130, 360, 380)
-    draw_card(card_rect, bg=CARD_BG_SOFT)
-    x, y, w, h = card_rect
-
-    draw_text("PEDALS / TEMP", font_sm, x+80, y+30, TEXT_SUB)
-
-    bar_w, bar_h = 70, 240
-    base_y = y + 70
-    x_thr = x + 70
-    x_brk = x + 210
-
-    # Throttle
-    fill_round_rect(screen, (x_thr, base_y, bar_w, bar_h), BAR_BG, 18)
-    ratio_t = throttle / 255.0
-    fill_ht = int((bar_h-16) * ratio_t)
-    if fill_ht > 0:
-        rect = (x_thr+8, base_y + bar_h-8-fill_ht, bar_w-16, fill_ht)
-        fill_round_rect(screen, rect, THR_COL, 12)
-    draw_text("THR", font_tiny, x_thr+bar_w//2, base_y+bar_h+6, TEXT_SUB, center=True)
-    draw_text(f"{int(ratio_t*100):3d}%", font_sm, x_thr+bar_w//2, base_y+bar_h+26, TEXT_MAIN, center=True)
-
-    # Brake
-    fill_round_rect(screen, (x_brk, base_y, bar_w, bar_h), BAR_BG, 18)
-    ratio_b = brake / 255.0
-    fill_hb = int((bar_h-16) * ratio_b)
-    if fill_hb > 0:
-        rect = (x_brk+8, base_y + bar_h-8-fill_hb, bar_w-16, fill_hb)
-        fill_round_rect(screen, rect, BRK_COL, 12)
-    draw_text("BRK", font_tiny, x_brk+bar_w//2, base_y+bar_h+6, TEXT_SUB, center=True)
-    draw_text(f"{int(ratio_b*100):3d}%", font_sm, x_brk+bar_w//2, base_y+bar_h+26, TEXT_MAIN, center=True)
+    bars = []
+    for value, color in ((snap.throttle, THR_COL), (snap.brake, BRK_COL)):
+        ratio = value / 255.0
+        bars.append((int((PEDAL_H-16) * ratio), f"{int(ratio*100):3d}%", color))
+    if not dirty.region("left", LEFT_CARD, bars):
+        return
+    for i, (fill_h, txt, color) in enumerate(bars):
+        tx, ty = pedal_track(i)
+        if fill_h > 0:
+            rect = (tx+8, ty + PEDAL_H-8-fill_h, PEDAL_W-16, fill_h)
+            fill_round_rect(screen, rect, color, 12)
+        draw_value(txt, font_sm, tx+PEDAL_W//2, ty+PEDAL_H+26, TEXT_MAIN, center=True)
 
 def draw_center_panel():
-    card_rect = (460, 130, 360, 380)
-    draw_card(card_rect, bg=CARD_BG_SOFT)
-    x, y, w, h = card_rect
+    x, y, w, h = CENTER_CARD
     max_speed_for_glow = 240.0
-    progress = clamp(speed_kmh / max_speed_for_glow, 0.0, 1.0)
-    draw_speed_glow(card_rect, progress)
-
-    gear_char = "N" if gear == 0 else str(gear)
-    draw_text(gear_char, font_big, x+w//2, y+120, CYAN, center=True)
+    progress = clamp(snap.speed_kmh / max_speed_for_glow, 0.0, 1.0)
+    gear_char = "N" if snap.gear == 0 else str(snap.gear)
+    rpm_txt = f"{int(snap.rpm):4d}"
+    spd_txt = f"{int(snap.speed_kmh):3d}"
+    # 光暈畫在卡片外 GLOW_PAD 以內
+    area = (x - GLOW_PAD, y - GLOW_PAD, w + 2*GLOW_PAD, h + 2*GLOW_PAD)
+    if not dirty.region("center", area, (int(2 * (w + h) * progress), gear_char, rpm_txt, spd_txt)):
+        return
+    draw_speed_glow(CENTER_CARD, progress)
 
-    draw_text(f"{int(rpm):4d}", font_mid, x+w//2, y+210, TEXT_MAIN, center=True)
-    draw_text("RPM", font_sm, x+w//2, y+245, TEXT_SUB, center=True)
+    draw_value(gear_char, font_big, x+w//2, y+120, CYAN, center=True)
 
-    draw_text(f"{int(speed_kmh):3d}", font_mid, x+w//2, y+300, TEXT_MAIN, center=True)
-    draw_text("km/h", font_sm, x+w//2, y+335, TEXT_SUB, center=True)
+    draw_value(rpm_txt, font_mid, x+w//2, y+210, TEXT_MAIN, center=True)
+    draw_value(spd_txt, font_mid, x+w//2, y+300, TEXT_MAIN, center=True)
 
 def draw_right_panel(current_lap, last_lap, best_lap):
-    card_rect = (880, 130, 360, 380)
-    draw_card(card_rect, bg=CARD_BG_SOFT)
-    x, y, w, h = card_rect
-    draw_text("LAP TIMES", font_sm, x+w//2, y+45, TEXT_SUB, center=True)
-    row_h = 90
-    rows = [
-        ("CURRENT", CYAN,   current_lap),
-        ("LAST",    YELLOW, last_lap),
-        ("BEST",    PINK,   best_lap if best_lap > 0 else current_lap)
-    ]
-
-    for i, (label, color, tval) in enumerate(rows):
-        ty = y + 90 + i * row_h
-        draw_text(label, font_tiny, x + 26, ty, TEXT_SUB)
-        draw_text(fmt_time(tval), font_mid, x + w - 26, ty - 6, color, align_right=True)
+    x, y, w, h = RIGHT_CARD
+    times = (current_lap, last_lap, best_lap if best_lap > 0 else current_lap)
+    for i, ((_, color), tval) in enumerate(zip(LAP_ROWS, times)):
+        # 每一列自己一塊：跑圈中通常只有 CURRENT 在變
+        ty = y + 90 + i * LAP_ROW_H
+        txt = fmt_time(tval)
+        if dirty.region(f"lap{i}", (x + 8, ty - 12, w - 16, LAP_ROW_H - 20), txt):
+            draw_value(txt, font_mid, x + w - 26, ty - 6, color, align_right=True)
 
 def draw_bottom_strip():
     mode_label = "UART" if USE_SERIAL else "Keyboard"
-    titles = [
-        ("STEER", f"{steer_norm:+0.2f}"),
-        ("THR %", f"{int(throttle/255.0*100):3d}"),
-        ("BRK %", f"{int(brake/255.0*100):3d}"),
-        ("TEMP", f"{int(temp_c):2d}°C"),
-        ("LAP",  str(lap_count)),
-        ("MODE", mode_label),
-    ]
-    card_w = 180
-    card_h = 64
-    gap    = 12
-    start_x = 40
-    y = H - card_h - 22
-
-    for i, (title, val) in enumerate(titles):
-        x = start_x + i * (card_w + gap)
-        radius = card_h // 2
-        draw_card((x, y, card_w, card_h), bg=(9, 21, 32), radius=radius)
-        center_x = x + card_w / 2
-
-        draw_text(title, font_tiny, center_x, y + card_h * 0.30, TEXT_SUB, center=True)
-        draw_text(val,   font_sm,   center_x, y + card_h * 0.70, TEXT_MAIN, center=True)
+    mode_col = TEXT_MAIN
+    if USE_SERIAL and pad_out.stale:
+        # watchdog：資料停了，手把已經拉回中立
+        mode_label, mode_col = "STALE", BRK_COL
+    values = (
+        f"{snap.steer_norm:+0.2f}",
+        f"{int(snap.throttle/255.0*100):3d}",
+        f"{int(snap.brake/255.0*100):3d}",
+        f"{int(snap.temp_c):2d}°C",
+        str(lap_count),
+        mode_label,
+    )
+    for i, val in enumerate(values):
+        color = mode_col if i == len(values) - 1 else TEXT_MAIN
+        rect = strip_rect(i)
+        if not dirty.region(f"strip{i}", rect, (val, color)):
+            continue
+        x, y, w, h = rect
+        draw_value(val, font_sm, x + w / 2, y + h * 0.70, color, center=True)
+
+build_background()
 
 # --------- 主迴圈 ---------
 while True:
-    dt = clock.tick(60) / 1000.0
+    dt = clock.tick(RENDER_FPS) / 1000.0
     now = time.time()
     current_lap = now - lap_start
 
@@ -379,6 +445,8 @@ while True:
     for e in pygame.event.get():
         if e.type == pygame.QUIT:
             cleanup()
+        if e.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+            dirty.invalidate()   # 視窗被蓋住又露出來：下一幀整張重送
         if e.type == pygame.KEYDOWN:
             if e.key == pygame.K_ESCAPE:
                 cleanup()
@@ -397,15 +465,15 @@ while True:
                     best_lap = last_lap
                 lap_count += 1
                 lap_start = now
-                pad.press_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_X)
+                pad_out.press(BUTTON_X)
             if e.key == pygame.K_z and not USE_SERIAL:
-                gear = clamp(gear + 1, 0, 8)
-                rpm = max(800, rpm - 2000)
-                pad.press_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_A)
+                tel.gear = clamp(tel.gear + 1, 0, 8)
+                tel.rpm = max(800, tel.rpm - 2000)
+                pad_out.press(BUTTON_A)
             if e.key == pygame.K_x and not USE_SERIAL:
-                gear = clamp(gear - 1, 0, 8)
-                rpm = max(800, rpm + 2000)
-                pad.press_button(button=vg.XUSB_BUTTON_XUSB_GAMEPAD_B)
+                tel.gear = clamp(tel.gear - 1, 0, 8)
+                tel.rpm = max(800, tel.rpm + 2000)
+                pad_out.press(BUTTON_B)
         if e.type == pygame.KEYUP:
             if not USE_SERIAL:
                 if e.key == pygame.K_LEFT:
@@ -417,60 +485,110 @@ while True:
                 if e.key == pygame.K_LSHIFT:
                     brk_held = False
             if e.key == pygame.K_RETURN:
-                pad.release_button(button=vg.XUSB_BUTTON.XUSB_GAMEPAD_X)
+                pad_out.release(BUTTON_X)
             if e.key == pygame.K_z and not USE_SERIAL:
-                pad.release_button(button=vg.XUSB_BUTTON_XUSB_GAMEPAD_A)
+                pad_out.release(BUTTON_A)
             if e.key == pygame.K_x and not USE_SERIAL:
-                pad.release_button(button=vg.XUSB_BUTTON_XUSB_GAMEPAD_B)
-
-    # UART 更新（若有開啟）
+                pad_out.release(BUTTON_B)
+
+    # UART 更新（若有開啟）；斷線重連期間先用鍵盤模式
+    was_serial = USE_SERIAL
+    USE_SERIAL = reader is not None and reader.connected
+    if was_serial and not USE_SERIAL:
+        # 斷線：鍵盤模式從中立開始，不接著最後一筆 UART 值慢慢衰減
+        # （手把那邊由 watchdog 從最後一筆拉回中立，拉完才用這裡 submit 的值）
+        tel.steer_norm = 0.0
+        tel.throttle = 0
+        tel.brake = 0
+        pad_ver = 0
+        if smoother is not None:
+            smoother.reset()   # 重連後不拿斷線前的歷史來內插
     process_serial()
+    if smoother is not None and USE_SERIAL:
+        apply_smoothing()
+
+    # v2：每秒回報一次掉包 / 重複 / CRC 錯誤（連線正常時不印）
+    if reader is not None and UART_PROTOCOL == 2 and now - link_report_t >= 1.0:
+        link_report_t = now
+        for rd in reader.readers:
+            r = rd.parser.link.rates()
+            if r["lost"] or r["duplicated"] or r["corrupt"]:
+                print(
+                    f"[UART] {rd.source.name}: {r['received']:.0f} frame/s, lost {r['lost']:.1f}/s, "
+                    f"dup {r['duplicated']:.1f}/s, corrupt {r['corrupt']:.1f}/s"
+                )
+
+    # LATENCY_TRACE / UART_TIMING：每秒印一次
+    if (tracer is not None or UART_TIMING) and now - trace_report_t >= 1.0:
+        trace_report_t = now
+        if tracer is not None:
+            print("[LAT]", tracer.format_report())
+        if UART_TIMING and reader is not None:
+            for rd in reader.readers:
+                c = rd.cadence.stats()
+                print(
+                    f"[UART] {rd.source.name}: {c['rate_hz']:.0f} Hz, jitter {c['jitter_ms']:.2f} ms, "
+                    f"{c['frames_per_read']:.1f} frames/read (max {c['max_burst']}), "
+                    f"loop {c['loop_us']:.0f} us"
+                )
 
     # ---- Keyboard 模式：自己模擬物理 ----
     if not USE_SERIAL:
         # Steering
         steer_speed = 2.0
         if left_held and not right_held:
-            steer_norm -= steer_speed * dt
+            tel.steer_norm -= steer_speed * dt
         elif right_held and not left_held:
-            steer_norm += steer_speed * dt
+            tel.steer_norm += steer_speed * dt
         else:
-            steer_norm *= (1.0 - 3.0 * dt)
-        steer_norm = clamp(steer_norm, -1.0, 1.0)
+            tel.steer_norm *= (1.0 - 3.0 * dt)
+        tel.steer_norm = clamp(tel.steer_norm, -1.0, 1.0)
 
         # 油門 / 煞車
         if gas_held:
-            throttle = clamp(throttle + int(420 * dt), 0, 255)
+            tel.throttle = clamp(tel.throttle + int(420 * dt), 0, 255)
         else:
-            throttle = clamp(throttle - int(360 * dt), 0, 255)
+            tel.throttle = clamp(tel.throttle - int(360 * dt), 0, 255)
         if brk_held:
-            brake = clamp(brake + int(460 * dt), 0, 255)
+            tel.brake = clamp(tel.brake + int(460 * dt), 0, 255)
         else:
-            brake = clamp(brake - int(360 * dt), 0, 255)
+            tel.brake = clamp(tel.brake - int(360 * dt), 0, 255)
 
         # 物理模型
-        accel = (throttle/255.0) * (3.0 + gear) - (brake/255.0)*8.0 - 0.02*speed_kmh
-        speed_kmh = clamp(speed_kmh + accel * 14.0 * dt, 0.0, 360.0)
+        accel = (tel.throttle/255.0) * (3.0 + tel.gear) - (tel.brake/255.0)*8.0 - 0.02*tel.speed_kmh
+        tel.speed_kmh = clamp(tel.speed_kmh + accel * 14.0 * dt, 0.0, 360.0)
 
-        rpm_target = 900 + speed_kmh*(40 + gear*5) + (throttle/255.0)*800
-        rpm += (rpm_target - rpm) * min(1.0, 5.0*dt)
-        rpm = clamp(rpm, 800, 10000)
+        rpm_target = 900 + tel.speed_kmh*(40 + tel.gear*5) + (tel.throttle/255.0)*800
+        tel.rpm += (rpm_target - tel.rpm) * min(1.0, 5.0*dt)
+        tel.rpm = clamp(tel.rpm, 800, 10000)
 
     # ---- 共用：溫度模擬 + 搖桿輸出 ----
-    temp_c += (0.02 if throttle>0 else -0.015) * (60*dt)
-    temp_c = clamp(temp_c, 70, 105)
+    tel.temp_c += (0.02 if tel.throttle>0 else -0.015) * (60*dt)
+    tel.temp_c = clamp(tel.temp_c, 70, 105)
 
-    steer_raw = int(clamp(steer_norm, -1.0, 1.0) * 32767)
+    # 這一幀的狀態定案；畫面 / 手把只看發布出來的 snap
+    snap = tel.publish()
 
-    pad.left_joystick(x_value=steer_raw, y_value=0)
-    pad.right_trigger(value=int(throttle))
-    pad.left_trigger(value=int(brake))
-    pad.update()
+    # 鍵盤模式的值交給輸出執行緒（三個欄位沒變就不用做）；UART 模式它直接讀遙測
+    if not USE_SERIAL and snap.changed_since(pad_ver, "steer_norm", "throttle", "brake"):
+        pad_ver = snap.version
+        pad_out.submit(int(snap.steer_norm * 1800), int(snap.throttle), int(snap.brake))
 
-    screen.fill(BG)
+    # 換檔燈只在轉速變了才重算；燈號一樣時 CommandWriter 也不會重送
+    if ffb is not None and snap.changed_since(led_ver, "rpm"):
+        led_ver = snap.version
+        ffb.leds(shift_light_mask(snap.rpm, *SHIFT_LIGHT_RPM, SHIFT_LIGHT_LEDS))
+
+    if not DIRTY_UPDATE:
+        dirty.invalidate()
+    dirty.begin()
     draw_top()
     draw_left_panel()
     draw_center_panel()
     draw_right_panel(current_lap, last_lap, best_lap)
     draw_bottom_strip()
-    pygame.display.flip()
\ No newline at end of file
+    dirty.present()
+
+    if flip_t_read:
+        tracer.record("flip", flip_t_read)
+        flip_t_read = 0
\ No newline at end of file
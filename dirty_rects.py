@@ -0,0 +1,57 @@
+"""只把有變的區塊送上螢幕：pygame.display.update(rects) 取代每幀整張 flip()。
+
+每個畫面元件（卡片 / pill）有固定的區塊，跟一個「顯示內容」的 key（畫出來的字串、
+像素位置）。key 跟上一幀一樣就整塊跳過；不一樣就先從 background 補回底圖再重畫，
+那一塊記成 dirty。變動面積超過 full_ratio 時直接 flip()，省得一堆小 rect 反而比較慢。
+"""
+import pygame
+
+
+class DirtyRegions:
+    """region(name, rect, key) → True 表示這塊要重畫（底圖已經補好）；present() 送上螢幕。"""
+
+    def __init__(self, screen, background=None, full_ratio=0.5):
+        self.screen = screen
+        self.background = background
+        self.full_ratio = full_ratio
+        self.area = screen.get_width() * screen.get_height()
+        self.keys = {}         # 區塊名稱 → 上次畫的 key
+        self.rects = []
+        self.full = True       # 下一幀整張重畫
+        self.flips = 0
+        self.updates = 0
+
+    def set_background(self, background):
+        self.background = background
+        self.invalidate()
+
+    def invalidate(self):
+        """整張重畫一次（換底圖、視窗被蓋住又露出來）。"""
+        self.keys.clear()
+        self.full = True
+
+    def region(self, name, rect, key):
+        if not self.full and self.keys.get(name) == key:
+            return False
+        self.keys[name] = key
+        rect = pygame.Rect(rect)
+        if not self.full:
+            self.screen.blit(self.background, rect, rect)
+        self.rects.append(rect)
+        return True
+
+    def begin(self):
+        """每幀畫東西之前呼叫：要整張重畫時先鋪整張底圖。"""
+        if self.full:
+            self.screen.blit(self.background, (0, 0))
+
+    def present(self):
+        rects = self.rects
+        if self.full or sum(r.w * r.h for r in rects) > self.area * self.full_ratio:
+            pygame.display.flip()
+            self.flips += 1
+        elif rects:
+            pygame.display.update(rects)
+            self.updates += 1
+        self.rects = []
+        self.full = False
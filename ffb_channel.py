@@ -0,0 +1,141 @@
+"""PC → MCU 回傳通道：力回饋 / 震動 / 換檔燈，跟遙測共用同一條 UART（格式見 uart_protocol）。
+
+    python ffb_channel.py [--count 2000]     # pty loopback：量 send() → 解碼 的延遲
+
+CommandWriter.send() 不會卡：只把指令放進「每種指令一格」的 slot，
+同種類還沒送出去的舊指令直接被新的蓋掉，所以 TX 再慢也只會積幾個 frame。
+真正寫 UART 的是背景執行緒。
+"""
+import threading
+import time
+
+from uart_protocol import CMD_FORCE, CMD_LEDS, CMD_RUMBLE, encode_command
+
+
+def shift_light_mask(rpm, lo=6000, hi=9000, leds=10):
+    """轉速 → 換檔燈 bitmask：lo 開始亮第一顆，hi 全亮（最多 15 顆）。"""
+    if rpm < lo:
+        return 0
+    n = leds if rpm >= hi else 1 + int((rpm - lo) * (leds - 1) / (hi - lo))
+    return (1 << n) - 1
+
+
+class CommandWriter(threading.Thread):
+    """非阻塞 TX 佇列：send() 只更新 slot，背景執行緒把最新的幾個指令一次寫出去。
+
+    source：有 write() 的 TelemetrySource（通常就是 reader.source，同一條 UART）。
+    內容跟上次送出的一樣就不送；refresh 秒沒送東西時把目前的狀態整組重送一次，
+    MCU 重開機 / 線重插後不用等下一次變化。
+    """
+
+    def __init__(self, source, refresh=0.5):
+        super().__init__(name="uart-tx", daemon=True)
+        self.source = source
+        self.refresh = refresh
+        self.sent = 0          # 寫出去的指令數
+        self.coalesced = 0     # 還沒送就被新指令蓋掉的數量
+        self.dropped = 0       # 寫入失敗（斷線中）丟掉的數量
+        self._slots = {}       # kind → frame bytes（等著送）
+        self._last = {}        # kind → 上次送出的 frame
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_evt = threading.Event()
+
+    def send(self, kind, a=0, b=0, value=0):
+        frame = encode_command(kind, a, b, value)
+        with self._lock:
+            old = self._slots.get(kind)
+            if old is None and self._last.get(kind) == frame:
+                return
+            if old is not None:
+                self.coalesced += 1
+            self._slots[kind] = frame
+        self._wake.set()
+
+    def rumble(self, large, small):
+        self.send(CMD_RUMBLE, large, small)
+
+    def force(self, value):
+        self.send(CMD_FORCE, value=max(-32768, min(32767, int(value))))
+
+    def leds(self, mask, brightness=255):
+        self.send(CMD_LEDS, brightness, 0, mask)
+
+    def stop(self, timeout=0.5):
+        self._stop_evt.set()
+        self._wake.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def run(self):
+        while not self._stop_evt.is_set():
+            if not self._wake.wait(self.refresh):
+                # 閒置太久：整組重送
+                with self._lock:
+                    for kind, frame in self._last.items():
+                        self._slots.setdefault(kind, frame)
+            self._wake.clear()
+            with self._lock:
+                pending, self._slots = self._slots, {}
+            if not pending:
+                continue
+            try:
+                self.source.write(b"".join(pending.values()))
+            except Exception:
+                # 斷線中（reader 正在重連），丟掉；refresh 會再補
+                self.dropped += len(pending)
+                continue
+            self.sent += len(pending)
+            self._last.update(pending)
+
+    def stats(self):
+        return {"sent": self.sent, "coalesced": self.coalesced, "dropped": self.dropped}
+
+
+def _loopback(count):
+    """PC 端寫 pty master，替身 MCU 讀 slave 用 CommandParser 解，量每筆的延遲。"""
+    import os
+    import tty
+
+    from telemetry_source import PtySource
+    from uart_protocol import CommandParser
+
+    host = PtySource().open()
+    mcu = os.open(host.slave_name, os.O_RDWR | os.O_NOCTTY)
+    tty.setraw(mcu)
+    writer = CommandWriter(host)
+    writer.start()
+    parser = CommandParser()
+
+    lat = []
+    for i in range(count):
+        t0 = time.perf_counter_ns()
+        writer.force(i - count // 2)
+        got = None
+        while got is None:
+            for cmd in parser.feed(os.read(mcu, 64)):
+                if cmd[0] == CMD_FORCE and cmd[3] == i - count // 2:
+                    got = time.perf_counter_ns()
+        lat.append((got - t0) / 1e3)
+        time.sleep(0.001)
+
+    # 一次灌很多：應該被合併，不會越積越多
+    for i in range(10000):
+        writer.leds(i & 0x3FF)
+    time.sleep(0.05)
+    writer.stop()
+    host.close()
+    os.close(mcu)
+
+    lat.sort()
+    print(f"send → decode: p50 {lat[len(lat) // 2]:.0f} us, p99 {lat[int(len(lat) * 0.99)]:.0f} us, "
+          f"max {lat[-1]:.0f} us ({count} commands)")
+    print("writer:", writer.stats(), "parser:", parser.stats())
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="DriveSync command channel loopback test")
+    ap.add_argument("--count", type=int, default=2000)
+    _loopback(ap.parse_args().count)
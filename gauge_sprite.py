@@ -0,0 +1,50 @@
+"""類比錶（dashboard_v3 / v4 的轉速錶、速度錶）：錶面畫一次，每幀只畫指針。
+
+錶面（外圈、色帶、刻度、刻度數字）交給 draw_face(surface, cx, cy, r) 畫進一張
+方形 surface，之後每幀整塊 blit；指針終點事先按 1/steps_per_deg 度查表，
+不用每幀算 cos / sin。錶面是不透明的（先鋪 bg），錶的方框裡不要放別的東西。
+"""
+import math
+
+import pygame
+
+
+class GaugeSprite:
+    """r：錶的半徑；角度用螢幕座標（同 pygame.draw.arc），從 start_deg 掃 sweep_deg 到 vmax。
+
+    pad：錶面超出 r 的部分（外圈）；needle_len：指針長度。
+    """
+
+    def __init__(self, r, start_deg, sweep_deg, vmax, draw_face, bg,
+                 pad=12, needle_len=None, needle_w=8, needle_color=(90, 180, 255),
+                 hub_r=10, hub_color=(240, 240, 240), steps_per_deg=4):
+        self.r = r
+        self.vmax = vmax
+        self.pad = pad
+        self.needle_w = needle_w
+        self.needle_color = needle_color
+        self.hub_r = hub_r
+        self.hub_color = hub_color
+
+        size = 2 * (r + pad)
+        face = pygame.Surface((size, size))
+        face.fill(bg)
+        draw_face(face, r + pad, r + pad, r)
+        self.face = face.convert() if pygame.display.get_surface() is not None else face
+
+        # 指針終點（相對圓心），index = 角度 * steps_per_deg
+        needle_len = r - 70 if needle_len is None else needle_len
+        self.steps = int(round(sweep_deg * steps_per_deg))
+        self.needle = []
+        for i in range(self.steps + 1):
+            a = math.radians(start_deg + sweep_deg * i / self.steps)
+            self.needle.append((int(needle_len * math.cos(a)), int(needle_len * math.sin(a))))
+
+    def draw(self, surface, cx, cy, value):
+        off = self.r + self.pad
+        surface.blit(self.face, (cx - off, cy - off))
+        ratio = max(0.0, min(1.0, value / self.vmax))
+        dx, dy = self.needle[int(ratio * self.steps + 0.5)]
+        pygame.draw.line(surface, self.needle_color, (cx, cy), (cx + dx, cy + dy), self.needle_w)
+        if self.hub_r:
+            pygame.draw.circle(surface, self.hub_color, (cx, cy), self.hub_r)
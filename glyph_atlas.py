@@ -0,0 +1,86 @@
+"""數字讀數用的字元快取：每個 font + 顏色只 render 一次每個字元，之後用 blit 拼出來。
+
+font.render() 每次都要重新排版、點陣化整串字；儀表上的數字每幀都在變，
+但來來去去就是那幾個值。拼好的整串再用一個小 LRU 記住（最多 CACHE_SIZE 筆），
+命中時只剩一次 blit；一直在變的圈速不會把穩定的轉速 / 百分比擠掉。
+數字用固定寬度排版（取最寬的那個數字），數值變動時整串不會左右晃。
+"""
+from collections import OrderedDict
+
+import pygame
+
+DEFAULT_CHARS = "0123456789+-.:% °C"
+CACHE_SIZE = 256
+
+
+class GlyphAtlas:
+    """一個 font + 顏色的字元表；不在表裡的字元第一次用到時補 render。"""
+
+    def __init__(self, font, color, chars=DEFAULT_CHARS):
+        self.font = font
+        self.color = color
+        self.glyphs = {}     # 字元 → (surface, advance, x 偏移)
+        self.cache = OrderedDict()   # 整串字 → 拼好的 surface（LRU，最近用的在後面）
+        digits = [font.render(d, True, color) for d in "0123456789"]
+        self.digit_w = max(s.get_width() for s in digits)
+        for d, surf in zip("0123456789", digits):
+            self.glyphs[d] = (surf, self.digit_w, (self.digit_w - surf.get_width()) // 2)
+        for ch in chars:
+            if ch not in self.glyphs:
+                self._add(ch)
+        self.height = digits[0].get_height()
+
+    def _add(self, ch):
+        surf = self.font.render(ch, True, self.color)
+        entry = (surf, surf.get_width(), 0)
+        self.glyphs[ch] = entry
+        return entry
+
+    def width(self, text):
+        glyphs = self.glyphs
+        return sum((glyphs.get(ch) or self._add(ch))[1] for ch in text)
+
+    def compose(self, text):
+        """把整串字拼成一張 surface（字元不重疊，用 RGBA_MAX 疊上去 alpha 才不會被混掉）。"""
+        cache = self.cache
+        surf = cache.get(text)
+        if surf is not None:
+            cache.move_to_end(text)
+            return surf
+        glyphs = self.glyphs
+        entries = [glyphs.get(ch) or self._add(ch) for ch in text]
+        w = sum(e[1] for e in entries)
+        surf = pygame.Surface((max(1, w), self.height), pygame.SRCALPHA)
+        x = 0
+        for g, adv, off in entries:
+            surf.blit(g, (x + off, 0), special_flags=pygame.BLEND_RGBA_MAX)
+            x += adv
+        if pygame.display.get_surface() is not None:
+            surf = surf.convert_alpha()
+        if len(cache) >= CACHE_SIZE:
+            cache.popitem(last=False)
+        cache[text] = surf
+        return surf
+
+    def draw(self, surface, text, x, y, center=False, align_right=False):
+        """對齊方式同 draw_text：預設左上角，center 以 (x, y) 為中心，align_right 以右上角。"""
+        surf = self.compose(text)
+        w = surf.get_width()
+        if center:
+            x -= w // 2
+            y -= self.height // 2
+        elif align_right:
+            x -= w
+        surface.blit(surf, (int(x), int(y)))
+        return w
+
+_atlases = {}
+
+
+def atlas_for(font, color):
+    """同一組 font + 顏色共用一個 atlas。"""
+    key = (id(font), tuple(color))
+    atlas = _atlases.get(key)
+    if atlas is None:
+        atlas = _atlases[key] = GlyphAtlas(font, color)
+    return atlas
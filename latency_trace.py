@@ -0,0 +1,102 @@
+"""端到端延遲追蹤：從 UART bytes 讀進來那一刻（read）起算，到各階段完成的時間。
+
+    decode   解出封包
+    publish  reader.latest 發布
+    submit   手把輸出執行緒把這筆送進 sink
+    flip     畫面 flip（顯示出這筆的那一幀）
+
+全部用 time.perf_counter_ns()。每個階段一個直方圖，report() 取出這段期間的
+p50 / p95 / p99 並換一個新的（rolling window）。沒開追蹤時各處只多一次 None 判斷。
+"""
+import time
+
+STAGES = ("decode", "publish", "submit", "flip")
+
+_SUB_BITS = 3                 # 每個 2 的次方再切 8 格，誤差 < 6.25%
+_SUB = 1 << _SUB_BITS
+_NBUCKETS = 48 * _SUB
+
+
+def _bucket(ns):
+    if ns < 2 * _SUB:
+        return ns if ns > 0 else 0
+    bl = ns.bit_length()
+    idx = (bl - _SUB_BITS) * _SUB + ((ns >> (bl - _SUB_BITS - 1)) & (_SUB - 1))
+    return idx if idx < _NBUCKETS else _NBUCKETS - 1
+
+
+def _bucket_mid(idx):
+    if idx < 2 * _SUB:
+        return idx
+    bl = idx // _SUB + _SUB_BITS
+    width = 1 << (bl - _SUB_BITS - 1)
+    return (_SUB + idx % _SUB) * width + width // 2
+
+
+class LatencyHistogram:
+    """對數刻度直方圖（HDR 類），add() 是 O(1)、不配置記憶體。"""
+
+    __slots__ = ("counts", "n", "max_ns")
+
+    def __init__(self):
+        self.counts = [0] * _NBUCKETS
+        self.n = 0
+        self.max_ns = 0
+
+    def add(self, ns):
+        self.counts[_bucket(ns)] += 1
+        self.n += 1
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def percentiles(self, qs=(50, 95, 99)):
+        """回傳 {q: ns}；沒有樣本時是空 dict。"""
+        if not self.n:
+            return {}
+        out = {}
+        targets = sorted((q, self.n * q / 100.0) for q in qs)
+        seen = 0
+        ti = 0
+        for idx, c in enumerate(self.counts):
+            if not c:
+                continue
+            seen += c
+            while ti < len(targets) and seen >= targets[ti][1]:
+                out[targets[ti][0]] = min(_bucket_mid(idx), self.max_ns)
+                ti += 1
+            if ti == len(targets):
+                break
+        return out
+
+
+class LatencyTracer:
+    """各階段一個直方圖；record() 可以從不同執行緒呼叫（一個階段最好只有一個寫入端）。"""
+
+    def __init__(self):
+        self.hist = {stage: LatencyHistogram() for stage in STAGES}
+        self.window_t = time.perf_counter()
+
+    def record(self, stage, t_read_ns, t_ns=None):
+        if t_ns is None:
+            t_ns = time.perf_counter_ns()
+        self.hist[stage].add(t_ns - t_read_ns)
+
+    def report(self):
+        """{stage: {"n", "p50", "p95", "p99", "max"}}（µs），並開始新的一段。"""
+        old, self.hist = self.hist, {stage: LatencyHistogram() for stage in STAGES}
+        self.window_t = time.perf_counter()
+        out = {}
+        for stage, h in old.items():
+            if not h.n:
+                continue
+            p = h.percentiles()
+            out[stage] = {"n": h.n, "p50": p[50] / 1e3, "p95": p[95] / 1e3,
+                          "p99": p[99] / 1e3, "max": h.max_ns / 1e3}
+        return out
+
+    def format_report(self):
+        rows = self.report()
+        return "  ".join(
+            f"{stage} {r['p50']:.0f}/{r['p95']:.0f}/{r['p99']:.0f}us(n={r['n']})"
+            for stage, r in rows.items()
+        ) or "no samples"
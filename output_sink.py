@@ -0,0 +1,219 @@
+"""手把輸出後端：vgamepad（Windows）/ uinput（Linux）/ null / recording。
+
+    make_sink("auto")           Windows 用 vgamepad，Linux 用 uinput，都不行就 null
+    make_sink("vgamepad")
+    make_sink("uinput")         需要 python-evdev 跟 /dev/uinput 寫入權限
+    make_sink("null")           什麼都不送（量其他環節用）
+    make_sink("record:out.csv") 每一筆 report 連同時間記下來，close() 時寫檔
+
+每個 sink 都會統計 report() 的耗時（perf_counter_ns），見 latency()。
+遊戲送來的震動（rumble）用 set_feedback(callback(large, small)) 接；目前只有 vgamepad 有。
+"""
+import sys
+import time
+
+# XUSB 按鍵位元（跟 vgamepad.XUSB_BUTTON 相同的值）
+BUTTON_DPAD_UP    = 0x0001
+BUTTON_DPAD_DOWN  = 0x0002
+BUTTON_DPAD_LEFT  = 0x0004
+BUTTON_DPAD_RIGHT = 0x0008
+BUTTON_START      = 0x0010
+BUTTON_BACK       = 0x0020
+BUTTON_LB         = 0x0100
+BUTTON_RB         = 0x0200
+BUTTON_A          = 0x1000
+BUTTON_B          = 0x2000
+BUTTON_X          = 0x4000
+BUTTON_Y          = 0x8000
+
+
+class OutputSink:
+    """共通介面：report(steer, throttle, brake, buttons) 送出一筆完整狀態。
+
+    steer：左搖桿 X（-32768..32767）；throttle / brake：0..255；buttons：BUTTON_* 位元組合。
+    子類別只要實作 send()；計時在 report() 裡做。
+    """
+
+    name = "?"
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def report(self, steer, throttle, brake, buttons=0):
+        t0 = time.perf_counter_ns()
+        self.send(steer, throttle, brake, buttons)
+        dt = time.perf_counter_ns() - t0
+        self.calls += 1
+        self.total_ns += dt
+        if dt > self.max_ns:
+            self.max_ns = dt
+
+    def send(self, steer, throttle, brake, buttons):
+        raise NotImplementedError
+
+    def reset(self):
+        self.report(0, 0, 0, 0)
+
+    def set_feedback(self, callback):
+        """遊戲端的震動通知 → callback(large_motor, small_motor)，不支援的 sink 不做事。"""
+
+    def close(self):
+        pass
+
+    def latency(self):
+        """report() 的次數 / 平均 / 最大耗時（µs）。"""
+        n = self.calls
+        return {
+            "calls":   n,
+            "mean_us": self.total_ns / n / 1e3 if n else 0.0,
+            "max_us":  self.max_ns / 1e3,
+        }
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.name}>"
+
+
+class VGamepadSink(OutputSink):
+    name = "vgamepad"
+
+    def __init__(self):
+        super().__init__()
+        import vgamepad   # 只有 Windows（ViGEmBus）才裝得起來
+        self.pad = vgamepad.VX360Gamepad()
+        self._buttons = 0
+
+    def send(self, steer, throttle, brake, buttons):
+        pad = self.pad
+        pad.left_joystick(x_value=steer, y_value=0)
+        pad.right_trigger(value=throttle)
+        pad.left_trigger(value=brake)
+        changed = buttons ^ self._buttons
+        if changed:
+            for bit in range(16):
+                mask = 1 << bit
+                if changed & mask:
+                    if buttons & mask:
+                        pad.press_button(button=mask)
+                    else:
+                        pad.release_button(button=mask)
+            self._buttons = buttons
+        pad.update()
+
+    def reset(self):
+        self.pad.reset()
+        self.pad.update()
+        self._buttons = 0
+
+    def set_feedback(self, callback):
+        # ViGEm 在自己的執行緒呼叫，callback 要很快（CommandWriter.rumble 只更新 slot）
+        def on_notification(client, target, large_motor, small_motor, led_number, user_data):
+            callback(large_motor, small_motor)
+        self._on_notification = on_notification   # 留參照，避免被回收
+        self.pad.register_notification(callback_function=on_notification)
+
+
+class UinputSink(OutputSink):
+    """Linux：用 python-evdev 建一個虛擬搖桿（/dev/uinput）。"""
+
+    name = "uinput"
+
+    def __init__(self, device_name="DriveSync Virtual Pad"):
+        super().__init__()
+        from evdev import AbsInfo, UInput, ecodes
+        self._ec = ecodes
+        self._btn_map = (
+            (BUTTON_A, ecodes.BTN_A), (BUTTON_B, ecodes.BTN_B),
+            (BUTTON_X, ecodes.BTN_X), (BUTTON_Y, ecodes.BTN_Y),
+            (BUTTON_LB, ecodes.BTN_TL), (BUTTON_RB, ecodes.BTN_TR),
+            (BUTTON_START, ecodes.BTN_START), (BUTTON_BACK, ecodes.BTN_SELECT),
+            (BUTTON_DPAD_UP, ecodes.BTN_DPAD_UP), (BUTTON_DPAD_DOWN, ecodes.BTN_DPAD_DOWN),
+            (BUTTON_DPAD_LEFT, ecodes.BTN_DPAD_LEFT), (BUTTON_DPAD_RIGHT, ecodes.BTN_DPAD_RIGHT),
+        )
+        caps = {
+            ecodes.EV_KEY: [code for _, code in self._btn_map],
+            ecodes.EV_ABS: [
+                (ecodes.ABS_X,  AbsInfo(0, -32768, 32767, 16, 128, 0)),
+                (ecodes.ABS_Z,  AbsInfo(0, 0, 255, 0, 0, 0)),   # 煞車（左扳機）
+                (ecodes.ABS_RZ, AbsInfo(0, 0, 255, 0, 0, 0)),   # 油門（右扳機）
+            ],
+        }
+        self.ui = UInput(caps, name=device_name)
+        self._last = None
+        self._buttons = 0
+
+    def send(self, steer, throttle, brake, buttons):
+        ec, ui = self._ec, self.ui
+        # evdev 本來就只關心變化，沒變的軸不寫
+        last = self._last or (None, None, None)
+        if steer != last[0]:
+            ui.write(ec.EV_ABS, ec.ABS_X, steer)
+        if brake != last[2]:
+            ui.write(ec.EV_ABS, ec.ABS_Z, brake)
+        if throttle != last[1]:
+            ui.write(ec.EV_ABS, ec.ABS_RZ, throttle)
+        changed = buttons ^ self._buttons
+        if changed:
+            for mask, code in self._btn_map:
+                if changed & mask:
+                    ui.write(ec.EV_KEY, code, 1 if buttons & mask else 0)
+            self._buttons = buttons
+        ui.syn()
+        self._last = (steer, throttle, brake)
+
+    def close(self):
+        self.ui.close()
+
+
+class NullSink(OutputSink):
+    name = "null"
+
+    def send(self, steer, throttle, brake, buttons):
+        pass
+
+
+class RecordingSink(OutputSink):
+    """記下每一筆 report：(perf_counter_ns, steer, throttle, brake, buttons)。"""
+
+    name = "record"
+
+    def __init__(self, path=None):
+        super().__init__()
+        self.path = path
+        self.records = []
+        if path:
+            self.name = f"record:{path}"
+
+    def send(self, steer, throttle, brake, buttons):
+        self.records.append((time.perf_counter_ns(), steer, throttle, brake, buttons))
+
+    def close(self):
+        if not self.path:
+            return
+        with open(self.path, "w") as f:
+            f.write("t_ns,steer,throttle,brake,buttons\n")
+            for rec in self.records:
+                f.write(",".join(map(str, rec)) + "\n")
+
+
+def make_sink(spec="auto"):
+    kind, _, arg = spec.partition(":")
+    if kind == "vgamepad":
+        return VGamepadSink()
+    if kind == "uinput":
+        return UinputSink()
+    if kind == "null":
+        return NullSink()
+    if kind == "record":
+        return RecordingSink(arg or None)
+    if kind != "auto":
+        raise ValueError(f"unknown output sink: {spec}")
+
+    candidates = (VGamepadSink,) if sys.platform == "win32" else (UinputSink,)
+    for cls in candidates:
+        try:
+            return cls()
+        except Exception as e:
+            print(f"[PAD] {cls.name} unavailable ({e}), output disabled")
+    return NullSink()
@@ -0,0 +1,144 @@
+"""虛擬手把輸出執行緒：跟畫面 FPS 脫鉤，固定頻率（或一有新遙測就）送出最新狀態。"""
+import threading
+import time
+
+from response_curve import ResponseCurves
+from uart_protocol import FIELDS
+
+# 遙測 tuple 裡方向 / 油門 / 煞車的位置
+_PAD_FIELDS = ("steer_x10", "throttle", "brake")
+_STEER, _THR, _BRK = (FIELDS.index(n) for n in _PAD_FIELDS)
+
+
+class PadOutput(threading.Thread):
+    """背景執行緒：把最新的方向 / 油門 / 煞車 / 按鍵推給輸出 sink（見 output_sink）。
+
+    rate_hz：每秒最多檢查幾次（250 / 500 / 1000）；狀態沒變就不送。
+    telemetry：TelemetryReader / TelemetryMerger；有連線時直接讀它的 latest，
+        不等主迴圈，wake_on_data=True 時收到新資料立刻送，不等下一個 tick。
+    沒有遙測（鍵盤模式）時用主迴圈 submit() 進來的值。
+    curves：ResponseCurves（deadzone / gamma / 自訂曲線的查表），預設線性。
+    tracer：LatencyTracer，有給就記 submit 延遲（從 UART bytes 讀進來起算）。
+
+    watchdog：遙測超過 stale_timeout 秒沒有新的合法 frame，就在 ramp 秒內
+    把方向 / 油門 / 煞車線性拉回 0（不會卡著最後一筆全油門），self.stale = True；
+    一收到新 frame 立刻恢復。每個 tick 都檢查，不看畫面 FPS。
+    線拔掉（connected 變 False）也一樣從最後一筆拉回中立，拉完才換成 submit() 的值。
+    多個來源時只看負責方向 / 油門 / 煞車的那幾個（telemetry.fields_t()）。
+    stale_timeout=None 關掉 watchdog（benchmark 用：資料停了就停在最後一筆）。
+
+    sink 只在這條執行緒裡呼叫；主迴圈只做 tuple / int 指派，不用上鎖。
+    """
+
+    def __init__(self, sink, rate_hz=500, telemetry=None, wake_on_data=True, curves=None,
+                 tracer=None, stale_timeout=0.05, ramp=0.15):
+        super().__init__(name="pad-output", daemon=True)
+        self.sink = sink
+        self.curves = curves or ResponseCurves()
+        self.tracer = tracer
+        self.period = 1.0 / rate_hz
+        self.telemetry = telemetry
+        self.wake_on_data = wake_on_data and telemetry is not None
+        self.state = (0, 0, 0)   # (steer_x10, throttle, brake) 整數，鍵盤模式由主迴圈寫入
+        self.buttons = 0         # BUTTON_* 位元組合，主迴圈寫入
+        self.stale_timeout = stale_timeout
+        self.ramp = ramp
+        self.stale = False       # watchdog 觸發中（dashboard 顯示用）
+        self.stale_events = 0
+        self.updates = 0         # 實際送出的 report 數
+        self._stop_evt = threading.Event()
+
+    def submit(self, steer_x10, throttle, brake):
+        self.state = (steer_x10, throttle, brake)
+
+    def press(self, button):
+        self.buttons |= int(button)
+
+    def release(self, button):
+        self.buttons &= ~int(button)
+
+    def stop(self, timeout=0.5):
+        self._stop_evt.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def _set_stale(self, stale):
+        if stale != self.stale:
+            self.stale = stale
+            if stale:
+                self.stale_events += 1
+                print("[PAD] telemetry stale, ramping to neutral")
+            else:
+                print("[PAD] telemetry back")
+
+    def _current(self, now):
+        """((steer_x10, throttle, brake), 這筆的讀取時間 ns 或 0)。"""
+        tel = self.telemetry
+        if tel is not None:
+            seq, values = tel.latest
+            if values is not None:
+                connected = tel.connected
+                timeout = self.stale_timeout
+                # 只看負責方向 / 踏板的來源；它們都還沒收過資料時沒有東西可以卡住
+                pad_t = tel.fields_t(_PAD_FIELDS)
+                if timeout is None or pad_t is None:
+                    if not connected:
+                        return self.state, 0
+                    over = 0.0
+                else:
+                    over = now - pad_t - timeout
+                if over > 0:
+                    self._set_stale(True)
+                    k = 1.0 - over / self.ramp if self.ramp > 0 else 0.0
+                    if k > 0.0:
+                        return (int(values[_STEER] * k), int(values[_THR] * k), int(values[_BRK] * k)), 0
+                    if connected:
+                        return (0, 0, 0), 0
+                    # 斷線而且已經回到中立：交給鍵盤模式
+                    return self.state, 0
+                if self.stale:
+                    self._set_stale(False)
+                if not connected:
+                    # 剛斷線、還沒超時：維持最後一筆，超時後照樣拉回中立
+                    return (values[_STEER], values[_THR], values[_BRK]), 0
+                t_read = 0
+                if self.tracer is not None:
+                    trace = tel.trace
+                    if trace[0] == seq:
+                        t_read = trace[1]
+                return (values[_STEER], values[_THR], values[_BRK]), t_read
+        if self.stale:
+            self._set_stale(False)
+        return self.state, 0
+
+    def run(self):
+        sink = self.sink
+        curve = self.curves.map
+        sent = None
+        next_t = time.perf_counter()
+        while not self._stop_evt.is_set():
+            now = time.perf_counter()
+            wait = next_t - now
+            if wait > 0:
+                if self.wake_on_data:
+                    ev = self.telemetry.new_data
+                    if ev.wait(wait):
+                        ev.clear()
+                else:
+                    self._stop_evt.wait(wait)
+                now = time.perf_counter()
+            if now >= next_t:
+                # 落後太多就重新對齊，不要一口氣補 tick
+                next_t = max(next_t + self.period, now)
+
+            state, t_read = self._current(now)
+            report = (*curve(*state), self.buttons)
+            if report == sent:
+                continue
+            sink.report(*report)
+            if t_read:
+                self.tracer.record("submit", t_read)
+            self.updates += 1
+            sent = report
+
+        sink.reset()
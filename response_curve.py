@@ -0,0 +1,97 @@
+"""方向盤 / 踏板反應曲線：啟動時算成查表，之後每筆輸出只要一次 index。
+
+曲線參數（都是 0..1 的比例）：
+    deadzone    小於這個量當 0
+    saturation  到這個量就算全開（之後都是 1）
+    exponent    deadzone 到 saturation 之間的 gamma（>1 中間比較鈍、<1 比較靈敏）
+    points      自訂曲線點 [(x, y), ...]，有給就取代 exponent（單調三次內插，不會過衝）
+
+方向盤左右對稱，只描述 0..1 半邊。
+"""
+
+STEER_RANGE_X10 = 1800   # 方向盤 ±180.0° → steer_x10 ±1800，查表 3601 格
+AXIS_MAX = 32767
+
+
+def _monotone_spline(points):
+    """Fritsch–Carlson 單調三次內插：回傳 f(x)，點之間不會超出相鄰兩點的範圍。"""
+    pts = sorted(points)
+    if pts[0][0] > 0.0:
+        pts.insert(0, (0.0, 0.0))
+    if pts[-1][0] < 1.0:
+        pts.append((1.0, 1.0))
+    xs = [p[0] for p in pts]
+    ys = [p[1] for p in pts]
+    n = len(pts)
+    d = [(ys[i + 1] - ys[i]) / (xs[i + 1] - xs[i]) for i in range(n - 1)]
+    m = [d[0]] + [0.0 if d[i - 1] * d[i] <= 0 else (d[i - 1] + d[i]) / 2
+                  for i in range(1, n - 1)] + [d[-1]]
+    for i in range(n - 1):
+        if d[i] == 0:
+            m[i] = m[i + 1] = 0.0
+            continue
+        a, b = m[i] / d[i], m[i + 1] / d[i]
+        s = a * a + b * b
+        if s > 9:
+            t = 3 / s ** 0.5
+            m[i], m[i + 1] = t * a * d[i], t * b * d[i]
+
+    def f(x):
+        i = 0
+        while i < n - 2 and x > xs[i + 1]:
+            i += 1
+        h = xs[i + 1] - xs[i]
+        t = (x - xs[i]) / h
+        t2, t3 = t * t, t * t * t
+        return ((2 * t3 - 3 * t2 + 1) * ys[i] + (t3 - 2 * t2 + t) * h * m[i]
+                + (-2 * t3 + 3 * t2) * ys[i + 1] + (t3 - t2) * h * m[i + 1])
+    return f
+
+
+def make_curve(deadzone=0.0, saturation=1.0, exponent=1.0, points=None):
+    """曲線參數 → f(x)，x / 回傳值都在 0..1。"""
+    if not 0.0 <= deadzone < saturation <= 1.0:
+        raise ValueError("need 0 <= deadzone < saturation <= 1")
+    shape = _monotone_spline(points) if points else (lambda u: u ** exponent)
+    span = saturation - deadzone
+
+    def f(x):
+        u = (x - deadzone) / span
+        if u <= 0.0:
+            return 0.0
+        if u >= 1.0:
+            return 1.0
+        return min(1.0, max(0.0, shape(u)))
+    return f
+
+
+def build_pedal_lut(**curve):
+    """0..255 → 0..255，256 格。"""
+    f = make_curve(**curve)
+    return tuple(int(round(f(i / 255.0) * 255)) for i in range(256))
+
+
+def build_steer_lut(range_x10=STEER_RANGE_X10, **curve):
+    """steer_x10（-range..range）→ 搖桿 X（±32767），index = steer_x10 + range。"""
+    f = make_curve(**curve)
+    half = [int(round(f(i / range_x10) * AXIS_MAX)) for i in range(range_x10 + 1)]
+    return tuple([-v for v in reversed(half[1:])] + half)
+
+
+class ResponseCurves:
+    """三條查表放在一起；map() 就是三次 index（方向盤多一次夾範圍）。"""
+
+    def __init__(self, steer=None, throttle=None, brake=None, range_x10=STEER_RANGE_X10):
+        self.range_x10 = range_x10
+        self.steer    = build_steer_lut(range_x10, **(steer or {}))
+        self.throttle = build_pedal_lut(**(throttle or {}))
+        self.brake    = build_pedal_lut(**(brake or {}))
+
+    def map(self, steer_x10, throttle, brake):
+        r = self.range_x10
+        i = steer_x10 + r
+        if i < 0:
+            i = 0
+        elif i > 2 * r:
+            i = 2 * r
+        return self.steer[i], self.throttle[throttle], self.brake[brake]
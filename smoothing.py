@@ -0,0 +1,81 @@
+"""畫面用的遙測平滑：留最近幾筆（host 時間, 值），內插到畫面要畫的那個時間點。
+
+MCU 照自己的節奏送、畫面固定 60 / 120 / 144 Hz 畫，直接拿最新值會一格一格跳；
+這裡把顯示時間往回推 delay 秒，落在兩筆之間就線性內插，
+比最新一筆還新（資料晚到）就用最後兩筆外插，最多 max_extrapolate 秒，之後停住。
+
+只影響畫面，手把輸出還是直接用最新的原始值。
+"""
+from collections import deque
+
+
+class TelemetrySmoother:
+    """push(t, values) 記錄一筆；sample(now) 回傳內插後的 tuple（還沒資料是 None）。
+
+    delay=None：自動用最近幾筆的平均間隔（剛好夠有前後兩筆可以內插）。
+    steps：不內插的欄位 index（例如檔位），取 <= 目標時間的最後一筆。
+    max_gap：兩筆間隔超過 max_gap 秒、或超過平均間隔 gap_ratio 倍（重連、資料停過）
+        就丟掉舊的歷史重新開始，不會把斷掉的那段拿來內插，也不會把平均間隔拉大。
+    """
+
+    def __init__(self, delay=None, max_extrapolate=0.05, history=8, steps=(),
+                 max_gap=0.25, gap_ratio=4.0):
+        self.delay = delay
+        self.max_extrapolate = max_extrapolate
+        self.max_gap = max_gap
+        self.gap_ratio = gap_ratio
+        self.steps = frozenset(steps)
+        self.hist = deque(maxlen=history)
+        self.interval = 0.0   # push 間隔的 EWMA（delay=None 時用）
+
+    def reset(self):
+        self.hist.clear()
+        self.interval = 0.0
+
+    def push(self, t, values):
+        hist = self.hist
+        if hist:
+            dt = t - hist[-1][0]
+            if dt <= 0:
+                # 同一個時間戳（或時鐘倒退）：只更新值
+                hist[-1] = (hist[-1][0], values)
+                return
+            interval = self.interval
+            if dt > self.max_gap or (interval and dt > interval * self.gap_ratio):
+                self.reset()
+                hist.append((t, values))
+                return
+            # 單筆最多只能把平均拉到兩倍，偶爾一筆晚到不會讓 delay 暴增
+            self.interval = dt if not interval else interval + (min(dt, 2 * interval) - interval) * 0.2
+        hist.append((t, values))
+
+    def sample(self, now):
+        hist = self.hist
+        if not hist:
+            return None
+        if len(hist) == 1:
+            return hist[0][1]
+
+        delay = self.interval if self.delay is None else self.delay
+        target = now - delay
+
+        t1, v1 = hist[-1]
+        if target >= t1:
+            # 比最新一筆還新：用最後兩筆外插一小段
+            t0, v0 = hist[-2]
+            target = min(target, t1 + self.max_extrapolate)
+        elif target <= hist[0][0]:
+            return hist[0][1]
+        else:
+            i = len(hist) - 1
+            while hist[i - 1][0] > target:
+                i -= 1
+            t0, v0 = hist[i - 1]
+            t1, v1 = hist[i]
+
+        k = (target - t0) / (t1 - t0)
+        steps = self.steps
+        return tuple(
+            (b if k >= 1.0 else a) if j in steps else a + (b - a) * k
+            for j, (a, b) in enumerate(zip(v0, v1))
+        )
@@ -0,0 +1,138 @@
+"""多個 MCU 分工（方向盤 / 踏板 / 排檔桿各一顆）時，把幾條遙測合成一份。
+
+每個來源一條 TelemetryReader 執行緒，互不等待；每個欄位只有一個 owner，
+只取 owner 那條來源的值。合併只在讀取端做（幾次 tuple 取值），
+來源再多、頻率再高都不會讓 reader 彼此卡住，也不會拖慢畫面。
+
+命令列 / 設定寫法："spec=欄位,欄位"，例如
+    COM8=steer_x10  COM9=throttle,brake  COM10=gear
+沒寫欄位的來源負責其餘所有欄位。
+"""
+import threading
+import time
+
+from uart_protocol import FIELDS
+from uart_reader import TelemetryReader
+
+FIELD_ALIASES = {"steer": "steer_x10", "thr": "throttle", "brk": "brake"}
+
+
+def parse_source_arg(arg):
+    """'COM9=throttle,brake' → ('COM9', ('throttle', 'brake'))；沒有 '=' 時欄位為 None。"""
+    spec, sep, fields = arg.rpartition("=")
+    if not sep:
+        return arg, None
+    names = tuple(FIELD_ALIASES.get(f, f) for f in fields.split(",") if f)
+    for name in names:
+        if name not in FIELDS:
+            raise ValueError(f"unknown field {name!r} in {arg!r} (fields: {', '.join(FIELDS)})")
+    return spec, names
+
+
+class TelemetryMerger:
+    """介面跟 TelemetryReader 一樣（latest / new_data / connected / stop），
+    dashboard 不用管後面是一個還是好幾個裝置。
+
+    routes = [(reader, fields or None), ...]
+    latest 每次讀取時從各 reader 的 latest 組出來，沒有共享的可變狀態，
+    主執行緒跟手把輸出執行緒同時讀也沒問題。
+    """
+
+    def __init__(self, routes):
+        if not routes:
+            raise ValueError("no telemetry sources")
+        self.readers = [r for r, _ in routes]
+        self.new_data = threading.Event()
+        for r in self.readers:
+            # 任何一個來源有新資料都叫醒同一個 Event
+            r.new_data = self.new_data
+
+        owner = {}
+        for i, (_, fields) in enumerate(routes):
+            for name in fields or ():
+                if name in owner:
+                    raise ValueError(f"field {name!r} claimed by two sources")
+                owner[name] = i
+        rest = [i for i, (_, fields) in enumerate(routes) if fields is None]
+        for name in FIELDS:
+            if name not in owner:
+                if not rest:
+                    raise ValueError(f"no source for field {name!r}")
+                owner[name] = rest[0]
+        # 欄位 k 取 readers[owner_of[k]] 的第 k 個值
+        self.owner_of = tuple(owner[name] for name in FIELDS)
+
+    @classmethod
+    def from_specs(cls, args, make_source, **reader_kw):
+        """['COM8=steer', 'COM9=throttle,brake'] → 建好 reader 的 merger（還沒 start）。"""
+        routes = []
+        for arg in args:
+            spec, fields = parse_source_arg(arg)
+            routes.append((TelemetryReader(make_source(spec), **reader_kw), fields))
+        return cls(routes)
+
+    @property
+    def latest(self):
+        snaps = [r.latest for r in self.readers]
+        if len(snaps) == 1:
+            return snaps[0]
+        # 各來源的 seq 只會增加，加總就能當合併後的 seq
+        seq = sum(s for s, _ in snaps)
+        vals = [v for _, v in snaps]
+        if all(v is None for v in vals):
+            return (seq, None)
+        # 還沒收到資料的來源，欄位先給 0
+        return (seq, tuple(vals[o][k] if vals[o] is not None else 0
+                           for k, o in enumerate(self.owner_of)))
+
+    @property
+    def trace(self):
+        """(seq, 最新的讀取時間)；seq 跟 latest 的對得上才是同一筆（見 latency_trace）。"""
+        traces = [r.trace for r in self.readers]
+        if len(traces) == 1:
+            return traces[0]
+        return (sum(s for s, _ in traces), max(t for _, t in traces))
+
+    @property
+    def latest_t(self):
+        """最舊的那個來源的最後一筆時間（還沒收過資料的是 0.0）。"""
+        return min(r.latest_t for r in self.readers)
+
+    def fields_t(self, names):
+        """負責 names 這幾個欄位的來源裡，最舊的最後一筆時間（watchdog 用）。
+
+        只看負責這些欄位的來源：排檔桿沒插不會讓方向盤 / 踏板被判成 stale。
+        還沒收過資料的來源不算（它的欄位本來就是 0）；全部都還沒收過回傳 None。
+        """
+        owners = {self.owner_of[FIELDS.index(n)] for n in names}
+        times = [self.readers[i].latest_t for i in owners if self.readers[i].latest_t]
+        return min(times) if times else None
+
+    @property
+    def newest_t(self):
+        """最新那個來源的最後一筆時間（畫面平滑用）。"""
+        return max(r.latest_t for r in self.readers)
+
+    @property
+    def connected(self):
+        return any(r.connected for r in self.readers)
+
+    def start(self):
+        for r in self.readers:
+            r.start()
+
+    def stop(self, timeout=0.5):
+        for r in self.readers:
+            r._stop_evt.set()
+        for r in self.readers:
+            r.stop(timeout)
+
+    def ages(self, now=None):
+        """各來源距離上一筆資料幾秒（還沒收過資料是 None）。"""
+        if now is None:
+            now = time.perf_counter()
+        return {r.source.name: (now - r.latest_t if r.latest_t else None)
+                for r in self.readers}
+
+    def stats(self):
+        return {r.source.name: r.stats() for r in self.readers}
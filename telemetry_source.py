@@ -0,0 +1,420 @@
+"""遙測輸入來源：serial / pty / TCP / UDP / 檔案，全部餵同一個 FrameParser。
+
+來源字串（open_source）：
+    COM8, /dev/ttyUSB0        pyserial
+    serial:COM8               同上
+    auto                      掃描所有串列埠，挑有在送 DriveSync 封包的那個
+    pty:/dev/pts/3            Linux pty（另一端由替身程式寫入）
+    pty:                      自己開一對 pty，印出 slave 路徑給替身程式用
+    tcp://host:port           連到 TCP server（例如另一台機器上的 relay）
+    udp://[host]:port         在本機 port 收 UDP
+    file:capture.bin          回放錄下來的原始資料（?loop 重複、?realtime 依 baud 控速）
+
+方向盤 MCU 接在另一台機器上時，在那台跑 relay：
+    python telemetry_source.py COM8 --tcp 9000
+"""
+import os
+import select
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FutureTimeout
+from urllib.parse import parse_qs, urlsplit
+
+from uart_protocol import make_parser
+
+READ_CHUNK = 4096   # 每次最多讀多少；來源有多少就一次拿多少
+
+
+class TelemetrySource:
+    """共通介面：read() 最多等 timeout 秒，沒資料回傳 b""；連線斷掉丟 OSError。
+
+    writable：write() 寫得回 MCU（回傳通道用，見 ffb_channel）。
+    """
+
+    name = "?"
+    writable = False
+
+    def __init__(self, timeout=0.01):
+        self.timeout = timeout
+
+    def open(self):
+        return self
+
+    def read(self, max_bytes=READ_CHUNK):
+        raise NotImplementedError
+
+    def write(self, data):
+        raise OSError(f"{self.name}: read-only source")
+
+    def close(self):
+        pass
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.name}>"
+
+
+class SerialSource(TelemetrySource):
+    writable = True
+
+    def __init__(self, port, baud=115200, timeout=0.01):
+        super().__init__(timeout)
+        import serial   # pyserial 沒裝時只有用到 serial 來源才會失敗
+        self._serial = serial
+        self.port = port
+        self.baud = baud
+        self.name = f"{port} @ {baud}"
+        self.ser  = None
+
+    def open(self):
+        self.ser = self._serial.Serial(self.port, self.baud, timeout=self.timeout)
+        return self
+
+    def read(self, max_bytes=READ_CHUNK):
+        ser = self.ser
+        return ser.read(min(max(ser.in_waiting, 1), max_bytes))
+
+    def write(self, data):
+        return self.ser.write(data)
+
+    def close(self):
+        if self.ser is not None:
+            self.ser.close()
+            self.ser = None
+
+
+def probe_port(port, baud=115200, deadline=None, protocol=1, min_frames=2, cancel=None):
+    """打開 port 讀到 deadline，解出 min_frames 筆合法封包就回傳 True。"""
+    parser = make_parser(protocol)
+    ser = None
+    try:
+        import serial
+        ser = serial.Serial(port, baud, timeout=0.02)
+        while time.monotonic() < deadline and not (cancel and cancel.is_set()):
+            data = ser.read(max(ser.in_waiting, 1))
+            if data and parser.feed(data) and parser.frames_decoded >= min_frames:
+                return True
+    except Exception:
+        pass
+    finally:
+        if ser is not None:
+            ser.close()
+    return False
+
+
+def discover_serial_port(baud=115200, timeout=0.5, protocol=1, ports=None):
+    """同時探測所有串列埠（每個 port 一條執行緒），回傳第一個送出合法封包的 port，找不到回傳 None。"""
+    if ports is None:
+        from serial.tools import list_ports
+        ports = [p.device for p in list_ports.comports()]
+    if not ports:
+        return None
+
+    deadline = time.monotonic() + timeout
+    found = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=len(ports), thread_name_prefix="uart-probe")
+    futs = {pool.submit(probe_port, p, baud, deadline, protocol, cancel=found): p for p in ports}
+    try:
+        # 有些驅動程式 open() 本身就會卡住，最多多等一點點就放棄
+        for f in as_completed(futs, timeout=timeout + 0.2):
+            if f.result():
+                found.set()
+                return futs[f]
+    except FutureTimeout:
+        pass
+    finally:
+        found.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+    return None
+
+
+class AutoSerialSource(SerialSource):
+    """自動找 port：拔掉重插換了 COM 編號也接得回來。
+
+    探測會打開機器上每一個串列埠（DTR 會把 Arduino 之類的板子重開、也會搶走別的裝置），
+    所以只在第一次、port 清單變了（插拔）、或距上次沒找到超過 rescan 秒時才掃；
+    上次接上的 port 還在就直接開它，不碰別人。
+    """
+
+    def __init__(self, baud=115200, timeout=0.01, protocol=1, probe_timeout=0.5, rescan=60.0):
+        super().__init__(None, baud, timeout)
+        self.protocol = protocol
+        self.probe_timeout = probe_timeout
+        self.rescan = rescan
+        self.name = f"auto @ {baud}"
+        self._probed = None     # 上次沒找到時的 port 清單
+        self._probed_t = 0.0
+
+    def open(self):
+        from serial.tools import list_ports
+        ports = sorted(p.device for p in list_ports.comports())
+        if self.port in ports:
+            return super().open()
+        now = time.monotonic()
+        if ports == self._probed and now - self._probed_t < self.rescan:
+            raise OSError("no DriveSync device found (waiting for a new port)")
+        port = discover_serial_port(self.baud, self.probe_timeout, self.protocol, ports)
+        if port is None:
+            self._probed, self._probed_t = ports, now
+            raise OSError("no DriveSync device found")
+        self._probed = None
+        self.port = port
+        self.name = f"{port} @ {self.baud} (auto)"
+        return super().open()
+
+
+class _FdSource(TelemetrySource):
+    """用 select 等資料的 file descriptor（pty）。"""
+
+    fd = None
+    writable = True
+
+    def read(self, max_bytes=READ_CHUNK):
+        r, _, _ = select.select((self.fd,), (), (), self.timeout)
+        if not r:
+            return b""
+        data = os.read(self.fd, max_bytes)
+        if not data:
+            raise OSError(f"{self.name}: closed")
+        return data
+
+    def write(self, data):
+        return os.write(self.fd, data)
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class PtySource(_FdSource):
+    """Linux pty。path=None 時自己開一對，self.slave_name 交給替身程式寫入。"""
+
+    def __init__(self, path=None, timeout=0.01):
+        super().__init__(timeout)
+        self.path = path
+        self.name = f"pty:{path or ''}"
+        self.slave_name = None
+        self._slave_fd  = None
+
+    def open(self):
+        import tty
+        if self.path:
+            self.fd = os.open(self.path, os.O_RDWR | os.O_NOCTTY)
+        else:
+            self.fd, self._slave_fd = os.openpty()
+            self.slave_name = os.ttyname(self._slave_fd)
+            tty.setraw(self._slave_fd)
+            self.name = f"pty:{self.slave_name}"
+        tty.setraw(self.fd)
+        return self
+
+    def close(self):
+        super().close()
+        if self._slave_fd is not None:
+            os.close(self._slave_fd)
+            self._slave_fd = None
+
+
+class TcpSource(TelemetrySource):
+    # write() 送得出去，但 relay 不會轉回 MCU，所以不算 writable
+    def __init__(self, host, port, timeout=0.01):
+        super().__init__(timeout)
+        self.addr = (host, port)
+        self.name = f"tcp://{host}:{port}"
+        self.sock = None
+
+    def open(self):
+        sock = socket.create_connection(self.addr, timeout=2.0)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.settimeout(self.timeout)
+        self.sock = sock
+        return self
+
+    def read(self, max_bytes=READ_CHUNK):
+        try:
+            data = self.sock.recv(max_bytes)
+        except socket.timeout:
+            return b""
+        if not data:
+            raise ConnectionError(f"{self.name}: closed by peer")
+        return data
+
+    def write(self, data):
+        return self.sock.sendall(data)
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+
+class UdpSource(TelemetrySource):
+    """在本機 port 收 UDP；每個 datagram 就是一段原始 bytes。write() 回給最後一個送來的位址。
+
+    relay 不會把回傳的東西轉給 MCU，所以跟 TcpSource 一樣不算 writable。
+    """
+
+    def __init__(self, host, port, timeout=0.01):
+        super().__init__(timeout)
+        self.addr = (host or "0.0.0.0", port)
+        self.name = f"udp://{host}:{port}"
+        self.sock = None
+        self.peer = None
+
+    def open(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(self.addr)
+        sock.settimeout(self.timeout)
+        self.sock = sock
+        return self
+
+    def read(self, max_bytes=READ_CHUNK):
+        try:
+            data, self.peer = self.sock.recvfrom(max(max_bytes, 65536))
+        except socket.timeout:
+            return b""
+        return data
+
+    def write(self, data):
+        if self.peer is None:
+            return 0
+        return self.sock.sendto(data, self.peer)
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+
+class FileSource(TelemetrySource):
+    """回放原始資料。realtime=True 時依 baud（10 bit / byte）控速，像真的 UART 一樣慢慢來。"""
+
+    def __init__(self, path, loop=False, realtime=False, baud=115200, timeout=0.01):
+        super().__init__(timeout)
+        self.path = path
+        self.loop = loop
+        self.realtime = realtime
+        self.byte_rate = baud / 10.0
+        self.name = f"file:{path}"
+        self.f = None
+        self._t0 = None
+        self._sent = 0
+
+    def open(self):
+        self.f = open(self.path, "rb")
+        self._t0 = time.perf_counter()
+        self._sent = 0
+        return self
+
+    def read(self, max_bytes=READ_CHUNK):
+        if self.realtime:
+            allowed = int((time.perf_counter() - self._t0) * self.byte_rate) - self._sent
+            if allowed <= 0:
+                time.sleep(self.timeout)
+                return b""
+            max_bytes = min(max_bytes, allowed)
+
+        data = self.f.read(max_bytes)
+        if not data:
+            if self.loop:
+                self.f.seek(0)
+                data = self.f.read(max_bytes)
+            else:
+                time.sleep(self.timeout)
+        self._sent += len(data)
+        return data
+
+    def close(self):
+        if self.f is not None:
+            self.f.close()
+            self.f = None
+
+
+def _host_port(netloc):
+    host, _, port = netloc.rpartition(":")
+    return host.strip("[]"), int(port)
+
+
+def make_source(spec, baud=115200, timeout=0.01, protocol=1):
+    """來源字串 → 還沒 open 的 TelemetrySource。"""
+    if "://" in spec:
+        u = urlsplit(spec)
+        if u.scheme == "tcp":
+            return TcpSource(*_host_port(u.netloc), timeout=timeout)
+        if u.scheme == "udp":
+            return UdpSource(*_host_port(u.netloc), timeout=timeout)
+        raise ValueError(f"unknown source: {spec}")
+
+    kind, sep, rest = spec.partition(":")
+    if sep and kind == "pty":
+        return PtySource(rest or None, timeout=timeout)
+    if sep and kind == "file":
+        path, _, query = rest.partition("?")
+        opts = parse_qs(query, keep_blank_values=True)
+        return FileSource(path, loop="loop" in opts, realtime="realtime" in opts,
+                          baud=baud, timeout=timeout)
+    if sep and kind == "serial":
+        spec = rest
+    if spec == "auto":
+        return AutoSerialSource(baud, timeout=timeout, protocol=protocol)
+    return SerialSource(spec, baud, timeout=timeout)
+
+
+def open_source(spec, baud=115200, timeout=0.01, protocol=1):
+    return make_source(spec, baud, timeout, protocol).open()
+
+
+def relay(src, tcp_port=None, udp_target=None):
+    """把來源的原始 bytes 轉送出去：當 TCP server（可多個 client）或送 UDP。"""
+    server = None
+    clients = []
+    if tcp_port is not None:
+        server = socket.create_server(("0.0.0.0", tcp_port))
+        server.setblocking(False)
+        print(f"[relay] {src.name} → tcp :{tcp_port}")
+    udp = None
+    if udp_target is not None:
+        udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        print(f"[relay] {src.name} → udp {udp_target[0]}:{udp_target[1]}")
+
+    while True:
+        if server is not None:
+            try:
+                conn, addr = server.accept()
+                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                clients.append(conn)
+                print("[relay] client", addr)
+            except BlockingIOError:
+                pass
+
+        data = src.read()
+        if not data:
+            continue
+        if udp is not None:
+            udp.sendto(data, udp_target)
+        for c in clients[:]:
+            try:
+                c.sendall(data)
+            except OSError:
+                clients.remove(c)
+                c.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="DriveSync telemetry relay")
+    ap.add_argument("source", help="source spec, e.g. COM8 or /dev/ttyUSB0")
+    ap.add_argument("--baud", type=int, default=115200)
+    ap.add_argument("--tcp", type=int, metavar="PORT", help="serve raw bytes on TCP PORT")
+    ap.add_argument("--udp", metavar="HOST:PORT", help="send raw bytes to HOST:PORT")
+    args = ap.parse_args()
+    if args.tcp is None and args.udp is None:
+        ap.error("need --tcp and/or --udp")
+
+    relay(open_source(args.source, args.baud),
+          tcp_port=args.tcp,
+          udp_target=_host_port(args.udp) if args.udp else None)
@@ -0,0 +1,67 @@
+"""儀表板遙測狀態：一個寫入端、多個讀取端（畫面 / 手把輸出 / 記錄）。
+
+寫入端（主迴圈）直接改 TelemetryState 的欄位，每一幀呼叫一次 publish()：
+有欄位變了才產生新的 Snapshot，並把 state.front 換成它（單一參照指派，
+其他執行緒讀 front 不用上鎖，拿到的一定是完整的一組）。
+
+每個欄位記著最後一次改變時的 version，讀取端記住自己上次處理到的 version，
+用 snap.changed_since(v, "rpm", "gear") 就知道要不要重做。
+"""
+from operator import attrgetter
+
+STATE_FIELDS = ("gear", "rpm", "speed_kmh", "throttle", "brake", "steer_norm", "temp_c")
+_FIELD_INDEX = {name: i for i, name in enumerate(STATE_FIELDS)}
+_get_values = attrgetter(*STATE_FIELDS)
+
+
+class Snapshot:
+    """publish() 產生的唯讀快照；欄位同 STATE_FIELDS，外加 version / versions。"""
+
+    __slots__ = STATE_FIELDS + ("version", "versions")
+
+    def __init__(self, values, version, versions):
+        (self.gear, self.rpm, self.speed_kmh, self.throttle,
+         self.brake, self.steer_norm, self.temp_c) = values
+        self.version  = version
+        self.versions = versions   # 每個欄位最後改變時的 version
+
+    def changed_since(self, version, *fields):
+        """從 version 之後，fields（沒給就是全部）有沒有任何一個變過。"""
+        if not fields:
+            return self.version > version
+        vers = self.versions
+        return any(vers[_FIELD_INDEX[name]] > version for name in fields)
+
+    def values(self):
+        return _get_values(self)
+
+
+class TelemetryState:
+    """可寫的那一份（double buffer 的 back），只給主迴圈改；front 是最新發布的 Snapshot。"""
+
+    __slots__ = STATE_FIELDS + ("front",)
+
+    def __init__(self, gear=1, rpm=900, speed_kmh=0.0, throttle=0, brake=0,
+                 steer_norm=0.0, temp_c=83.0):
+        self.gear       = gear
+        self.rpm        = rpm
+        self.speed_kmh  = speed_kmh
+        self.throttle   = throttle     # 0..255
+        self.brake      = brake        # 0..255
+        self.steer_norm = steer_norm   # -1..1
+        self.temp_c     = temp_c
+        self.front = Snapshot(_get_values(self), 1, (1,) * len(STATE_FIELDS))
+
+    def publish(self):
+        """把目前欄位發布成新的 Snapshot；都沒變就直接回傳原本的 front。"""
+        front = self.front
+        values = _get_values(self)
+        old = front.values()
+        if values == old:
+            return front
+        version = front.version + 1
+        versions = tuple(version if new != prev else v
+                         for new, prev, v in zip(values, old, front.versions))
+        snap = Snapshot(values, version, versions)
+        self.front = snap
+        return snap
@@ -0,0 +1,544 @@
+# UART 封包（對應韌體 Car_Info_To_UART，16 bits 一律 big-endian：Hi 在前）
+"""
+Byte0  : 0xAB          (Header)
+Byte1  : '.'
+Byte2  : Gear          (1B)
+Byte3  : '.'
+Byte4  : RPM High      (RPM = uint16)
+Byte5  : RPM Low
+Byte6  : '.'
+Byte7  : Speed High    (Speed = uint16)
+Byte8  : Speed Low
+Byte9  : '.'
+Byte10 : Throttle      (0 – 255)
+Byte11 : '.'
+Byte12 : Brake         (0 – 255)
+Byte13 : '.'
+Byte14 : Steering High (int16 = real_angle * 10)
+Byte15 : Steering Low
+"""
+import binascii
+import struct
+import time
+from operator import itemgetter
+
+FRAME_LEN = 16
+HEADER    = 0xAB
+SEP       = 0x2E
+SEP_POS   = (1, 3, 6, 9, 11, 13)
+
+# Protocol v2（韌體 UART_PROTOCOL_V2）：拿掉 '.' 分隔符，加序號與 CRC
+"""
+Byte0      : 0xAB          (Header)
+Byte1      : 0xC2          (版本標記，v1 這裡固定是 '.')
+Byte2..3   : Seq           (uint16，每送一筆 +1)
+Byte4      : Gear
+Byte5..6   : RPM           (uint16)
+Byte7..8   : Speed         (uint16)
+Byte9      : Throttle
+Byte10     : Brake
+Byte11..12 : Steering      (int16 = real_angle * 10)
+Byte13..14 : CRC-16/CCITT-FALSE（poly 0x1021, init 0xFFFF），算 Byte1..Byte12
+"""
+FRAME_LEN_V2 = 15
+VERSION_V2   = 0xC2
+
+
+def _make_crc16_table(poly=0x1021):
+    table = []
+    for i in range(256):
+        crc = i << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ poly) if crc & 0x8000 else (crc << 1)
+        table.append(crc & 0xFFFF)
+    return tuple(table)
+
+CRC16_TABLE = _make_crc16_table()
+
+
+def crc16(data, start=0, end=None, crc=0xFFFF):
+    """CRC-16/CCITT-FALSE，查表一次處理一個 byte。"""
+    table = CRC16_TABLE
+    if end is None:
+        end = len(data)
+    for i in range(start, end):
+        crc = ((crc << 8) & 0xFFFF) ^ table[(crc >> 8) ^ data[i]]
+    return crc
+
+
+class FrameSchema:
+    """宣告式封包格式：啟動時依欄位清單編好 struct，產生 encoder / decoder / validator。
+
+    layout 每一項是 (欄位名稱, struct 格式字元) 或 (None, 固定 byte 值)；
+    固定值（header、分隔符、版本標記）只拿來驗證，不會出現在解碼結果裡。
+    crc=(start, end)：最後一個欄位是 CRC-16，涵蓋 frame 的 [start, end)。
+
+    要加新通道（例如 left_btn / right_btn / adc_volt）只要在 layout 多加一項，
+    解碼仍然是一次 unpack_from，不用再手寫位移、符號處理。
+    """
+
+    def __init__(self, layout, crc=None):
+        dec = enc = chk = ">"
+        self.names   = []
+        self.fields  = []   # (名稱, offset, struct 格式字元)
+        self.const_at = []  # (offset, 固定值)
+        self._consts = []
+        self._slots  = []   # encode 時每個 struct 參數：固定值或 None（由欄位填）
+        off = 0
+        for name, spec in layout:
+            if name is None:
+                dec += "x"
+                enc += "B"
+                chk += "B"
+                self._consts.append(spec)
+                self._slots.append(spec)
+                self.const_at.append((off, spec))
+                off += 1
+            else:
+                size = struct.calcsize(">" + spec)
+                dec += spec
+                enc += spec
+                chk += "%dx" % size
+                self.names.append(name)
+                self.fields.append((name, off, spec))
+                self._slots.append(None)
+                off += size
+
+        self._dec   = struct.Struct(dec)
+        self._enc   = struct.Struct(enc)
+        self._chk   = struct.Struct(chk)
+        self._consts = tuple(self._consts)
+        self.size   = self._dec.size
+        self.crc    = crc
+        self.unpack_from = self._dec.unpack_from
+        if crc is not None:
+            self._crc_at = self.size - 2
+
+    def picker(self, names):
+        """unpack_from() 的結果 → 只留 names 這幾個欄位（照 names 的順序）的 tuple。"""
+        idx = [self.names.index(n) for n in names]
+        if len(idx) == 1:
+            i = idx[0]
+            return lambda values: (values[i],)
+        return itemgetter(*idx)
+
+    def valid(self, buf, pos=0):
+        if self._chk.unpack_from(buf, pos) != self._consts:
+            return False
+        if self.crc is None:
+            return True
+        start, end = self.crc
+        at = pos + self._crc_at
+        # crc_hqx 就是同一個 CRC-16/CCITT（poly 0x1021），在 C 裡算比查表迴圈快
+        return binascii.crc_hqx(buf[pos + start:pos + end], 0xFFFF) == ((buf[at] << 8) | buf[at + 1])
+
+    def encode(self, *values):
+        """依 names 順序給值（有 CRC 的話最後的 crc 欄位不用給，會自動算）。"""
+        if self.crc is not None:
+            values += (0,)
+        it = iter(values)
+        out = bytearray(self._enc.pack(*[next(it) if s is None else s for s in self._slots]))
+        if self.crc is not None:
+            start, end = self.crc
+            out[self._crc_at:] = crc16(out, start, end).to_bytes(2, "big")
+        return bytes(out)
+
+
+SCHEMA_V1 = FrameSchema([
+    (None, HEADER),
+    (None, SEP), ("gear",      "B"),
+    (None, SEP), ("rpm",       "H"),
+    (None, SEP), ("speed",     "H"),
+    (None, SEP), ("throttle",  "B"),
+    (None, SEP), ("brake",     "B"),
+    (None, SEP), ("steer_x10", "h"),
+])
+
+# 解碼後的欄位順序（每筆 frame 都是這個順序的 tuple）；加通道只要改 layout，
+# 用到值的地方一律 FIELDS.index("...") 找位置（v2 的 layout 也要有同名欄位）
+FIELDS = tuple(SCHEMA_V1.names)
+
+SCHEMA_V2 = FrameSchema([
+    (None, HEADER),
+    (None, VERSION_V2),
+    ("seq",       "H"),
+    ("gear",      "B"),
+    ("rpm",       "H"),
+    ("speed",     "H"),
+    ("throttle",  "B"),
+    ("brake",     "B"),
+    ("steer_x10", "h"),
+    ("crc",       "H"),
+], crc=(1, 13))
+
+
+# 反方向（PC → MCU）：力回饋 / 震動 / 換檔燈指令
+"""
+Byte0     : 0xAD          (Header，跟遙測的 0xAB 分開，接反了也不會誤判)
+Byte1     : Kind          (CMD_*)
+Byte2     : A             (RUMBLE：大馬達 0..255；LEDS：亮度)
+Byte3     : B             (RUMBLE：小馬達 0..255)
+Byte4..5  : Value         (int16；FORCE：力道 -32768..32767；LEDS：燈號 bitmask)
+Byte6..7  : CRC-16/CCITT-FALSE，算 Byte1..Byte5
+"""
+CMD_HEADER = 0xAD
+CMD_RUMBLE = 1
+CMD_FORCE  = 2
+CMD_LEDS   = 3
+
+SCHEMA_CMD = FrameSchema([
+    (None, CMD_HEADER),
+    ("kind",  "B"),
+    ("a",     "B"),
+    ("b",     "B"),
+    ("value", "h"),
+    ("crc",   "H"),
+], crc=(1, 6))
+
+
+def encode_command(kind, a=0, b=0, value=0):
+    return SCHEMA_CMD.encode(kind, a, b, value)
+
+
+def encode_frame(*values):
+    """Python 版 Car_Info_To_UART（v1），值照 FIELDS 順序，沒有板子時拿來測試。"""
+    return SCHEMA_V1.encode(*values)
+
+
+def encode_frame_v2(seq, *values):
+    """Python 版 Car_Info_To_UART_V2，seq 之後的值照 FIELDS 順序。"""
+    fields = dict(zip(FIELDS, values), seq=seq & 0xFFFF)
+    return SCHEMA_V2.encode(*[fields[name] for name in SCHEMA_V2.names if name != "crc"])
+
+
+class LinkStats:
+    """v2 序號 / CRC 統計：遺失、重複、損壞。rates() 回傳距上次呼叫的每秒數量。
+
+    MCU 重開機（韌體的 seq 從 0 重來）、線重插、回放檔繞回開頭時序號會往回跳：
+    跳超過 restart_gap，或連續 restart_run 筆往回但彼此接得上，就當成對方重新開始
+    （restarts +1），從新的序號接著算，不會把之後的 frame 全當成重複丟掉。
+    """
+
+    def __init__(self, restart_gap=1024, restart_run=3):
+        self.received   = 0
+        self.lost       = 0
+        self.duplicated = 0
+        self.corrupt    = 0
+        self.restarts   = 0
+        self.restart_gap = restart_gap
+        self.restart_run = restart_run
+        self.last_seq   = None
+        self._pending_corrupt = 0   # 上一筆之後 CRC 錯的筆數，序號缺口裡不重複算成遺失
+        self._back_run  = 0         # 連續往回、但彼此接得上的筆數
+        self._back_seq  = None
+        self._mark_t    = time.monotonic()
+        self._mark      = (0, 0, 0, 0)
+
+    def resync(self):
+        """忘掉上一筆序號（重新連線後呼叫），下一筆直接接受。"""
+        self.last_seq = None
+        self._pending_corrupt = 0
+        self._back_run = 0
+        self._back_seq = None
+
+    def on_seq(self, seq):
+        """記錄收到的序號；重複或比上一筆舊就回傳 False（不要套用）。"""
+        last = self.last_seq
+        if last is not None:
+            d = (seq - last) & 0xFFFF
+            if d == 0 or d >= 0x8000:
+                if d and (0x10000 - d > self.restart_gap or self._backward(seq)):
+                    return self._restart(seq)
+                self.duplicated += 1
+                return False
+            if d > self.restart_gap:
+                # 一次往前跳太多：對方重開了，不是掉了幾千筆
+                return self._restart(seq)
+            missing = d - 1 - self._pending_corrupt
+            if missing > 0:
+                self.lost += missing
+        self._pending_corrupt = 0
+        self._back_run = 0
+        self.last_seq = seq
+        self.received += 1
+        return True
+
+    def _backward(self, seq):
+        """記下一筆往回跳的序號；連續 restart_run 筆而且一筆接一筆就回傳 True。"""
+        if self._back_run and seq == (self._back_seq + 1) & 0xFFFF:
+            self._back_run += 1
+        else:
+            self._back_run = 1
+        self._back_seq = seq
+        return self._back_run >= self.restart_run
+
+    def _restart(self, seq):
+        # 前面幾筆往回的其實不是重複，只是當下還看不出來
+        self.duplicated -= max(0, self._back_run - 1)
+        self.restarts += 1
+        self.resync()
+        return self.on_seq(seq)
+
+    def on_corrupt(self):
+        self.corrupt += 1
+        self._pending_corrupt += 1
+
+    def totals(self):
+        return (self.received, self.lost, self.duplicated, self.corrupt)
+
+    def rates(self, now=None):
+        if now is None:
+            now = time.monotonic()
+        cur = self.totals()
+        dt  = max(now - self._mark_t, 1e-6)
+        out = {k: (c - m) / dt for k, c, m in
+               zip(("received", "lost", "duplicated", "corrupt"), cur, self._mark)}
+        self._mark_t = now
+        self._mark   = cur
+        return out
+
+
+class FrameParser:
+    """固定容量的接收緩衝 + 封包解析。
+
+    buf 一開始就配好，head / tail 兩個 index 標出還沒解的資料；
+    解封包直接在 buf 上讀，不切 slice、不 pop(0)。
+    封包格式由 schema 決定（v2 另外在 FrameParserV2 處理序號）。
+    不同步時用 buf.find(header) 一次跳過整段垃圾，雜訊再多也是線性時間。
+    tail 碰到尾端時把剩下沒解的幾個 byte 搬回開頭（通常不到一個 frame）。
+    """
+
+    schema = SCHEMA_V1
+
+    def __init__(self, capacity=4096):
+        self.frame_len = self.schema.size
+        self.header    = self.schema.const_at[0][1]
+        self._unpack   = self.schema.unpack_from
+        self.capacity = capacity
+        self.buf  = bytearray(capacity)
+        self.view = memoryview(self.buf)
+        self.head = 0
+        self.tail = 0
+
+        # 統計
+        self.frames_decoded = 0   # 成功解出的 frame
+        self.resync_bytes   = 0   # 找 header 時丟掉的 byte
+        self.bad_frames     = 0   # header 對了但格式 / 檢查碼錯
+        self.overflow_bytes = 0   # 緩衝滿了被丟掉的舊資料
+        self.frames_skipped = 0   # feed_latest() 合併掉、沒解碼的舊 frame
+
+    def reset(self):
+        self.head = self.tail = 0
+
+    def pending(self):
+        return self.tail - self.head
+
+    def _write(self, data):
+        n = len(data)
+        if n > self.capacity:
+            # 一次塞進來比整個緩衝還大：只留最後 capacity 個 byte
+            self.overflow_bytes += (self.tail - self.head) + n - self.capacity
+            data = memoryview(data)[n - self.capacity:]
+            n = self.capacity
+            self.head = self.tail = 0
+        elif self.tail + n > self.capacity:
+            # 把還沒解的部分搬回開頭
+            left = self.tail - self.head
+            if left + n > self.capacity:
+                drop = left + n - self.capacity
+                self.overflow_bytes += drop
+                self.head += drop
+                left -= drop
+            self.buf[:left] = self.buf[self.head:self.tail]
+            self.head = 0
+            self.tail = left
+        self.view[self.tail:self.tail + n] = data
+        self.tail += n
+
+    def _check(self, buf, pos):
+        """只看格式對不對，不記任何統計（feed_latest 往回找的時候用）。"""
+        return self.schema.valid(buf, pos)
+
+    def _valid(self, buf, pos):
+        # header / 分隔符（v2 另外驗 CRC），不同步的 frame 在這裡擋掉
+        return self._check(buf, pos)
+
+    def _decode(self, buf, pos):
+        return self._unpack(self.view, pos)
+
+    def _skip(self, buf, head, pos):
+        """feed_latest() 跳過 [head, pos) 這段時呼叫，回傳算成幾筆 frame。
+
+        v1 沒有序號可對，乾淨的資料流裡每 frame_len 個 byte 就是一筆。
+        """
+        return (pos - head) // self.frame_len
+
+    def feed(self, data):
+        """塞入新收到的 bytes，回傳這次解出的所有 frame（list of tuple，順序同 FIELDS）。"""
+        if data:
+            self._write(data)
+
+        buf  = self.buf
+        head = self.head
+        tail = self.tail
+        out  = []
+
+        flen = self.frame_len
+        header = self.header
+        while tail - head >= flen:
+            # 尋找封包開頭（0xAB）
+            if buf[head] != header:
+                pos = buf.find(header, head, tail)
+                if pos < 0:
+                    self.resync_bytes += tail - head
+                    head = tail
+                    break
+                self.resync_bytes += pos - head
+                head = pos
+                continue
+
+            if not self._valid(buf, head):
+                # 封包壞掉，丟掉這個 header 繼續找下一個
+                self.bad_frames   += 1
+                self.resync_bytes += 1
+                head += 1
+                continue
+
+            frame = self._decode(buf, head)
+            if frame is not None:
+                out.append(frame)
+            head += flen
+
+        self.frames_decoded += len(out)
+        if head == tail:
+            head = tail = 0
+        self.head = head
+        self.tail = tail
+        return out
+
+    def feed_latest(self, data):
+        """塞入新收到的 bytes，只解最新一筆完整 frame（沒有就回傳 None）。
+
+        畫面卡頓後緩衝裡可能堆了好幾筆，逐筆解完手把才拿到最新值；
+        這裡從尾巴往回找最後一個合法 frame，前面的不解碼，只交給 _skip() 計數（frames_skipped）。
+        """
+        if data:
+            self._write(data)
+
+        buf  = self.buf
+        head = self.head
+        tail = self.tail
+        flen = self.frame_len
+        if tail - head < 2 * flen:
+            # 最多一筆，走一般路徑
+            frames = self.feed(None)
+            return frames[-1] if frames else None
+
+        # 往回找只用 _check()：壞掉的 frame 留給後面的 _skip() / feed() 計數，才不會算兩次
+        pos = buf.rfind(self.header, head, tail - flen + 1)
+        while pos >= 0 and not self._check(buf, pos):
+            pos = buf.rfind(self.header, head, pos)
+
+        if pos < 0:
+            # 整段都找不到合法 frame，交給一般路徑處理重新同步
+            frames = self.feed(None)
+            return frames[-1] if frames else None
+
+        self.frames_skipped += self._skip(buf, head, pos)
+        self.head = pos
+        frames = self.feed(None)
+        return frames[-1] if frames else None
+
+    def stats(self):
+        return {
+            "frames_decoded": self.frames_decoded,
+            "resync_bytes":   self.resync_bytes,
+            "bad_frames":     self.bad_frames,
+            "overflow_bytes": self.overflow_bytes,
+            "frames_skipped": self.frames_skipped,
+        }
+
+
+class FrameParserV2(FrameParser):
+    """Protocol v2：版本標記 + CRC 驗證，序號交給 LinkStats 算遺失 / 重複。"""
+
+    schema = SCHEMA_V2
+
+    def __init__(self, capacity=4096):
+        super().__init__(capacity)
+        self.link = LinkStats()
+        self._seq = self.schema.names.index("seq")
+        self._pick = self.schema.picker(FIELDS)   # 拿掉 seq / crc，跟 v1 一樣的 tuple
+
+    def reset(self):
+        super().reset()
+        self.link.resync()   # 重新連線後對方可能已經重開機，序號從頭來
+
+    def _check(self, buf, pos):
+        return buf[pos + 1] == VERSION_V2 and self.schema.valid(buf, pos)
+
+    def _valid(self, buf, pos):
+        if buf[pos + 1] != VERSION_V2:
+            return False
+        if not self.schema.valid(buf, pos):
+            self.link.on_corrupt()
+            return False
+        return True
+
+    def _decode(self, buf, pos):
+        values = self._unpack(self.view, pos)
+        if not self.link.on_seq(values[self._seq]):
+            return None
+        return self._pick(values)
+
+    def _skip(self, buf, head, pos):
+        """被合併掉的 frame 也逐筆驗 CRC、記序號（只是不組 tuple），
+        否則壞掉 / 掉包的 frame 會被當成收到，LinkStats 就看不到線路問題。"""
+        header = self.header
+        flen = self.frame_len
+        on_seq = self.link.on_seq
+        n = 0
+        p = head
+        while p < pos:
+            if buf[p] != header:
+                q = buf.find(header, p, pos)
+                if q < 0:
+                    self.resync_bytes += pos - p
+                    break
+                self.resync_bytes += q - p
+                p = q
+                continue
+            if not self._valid(buf, p):
+                self.bad_frames   += 1
+                self.resync_bytes += 1
+                p += 1
+                continue
+            on_seq(self._unpack(self.view, p)[self._seq])
+            n += 1
+            p += flen
+        return n
+
+    def stats(self):
+        out = super().stats()
+        out.update(zip(("received", "lost", "duplicated", "corrupt"), self.link.totals()))
+        out["restarts"] = self.link.restarts
+        return out
+
+
+class CommandParser(FrameParser):
+    """PC → MCU 指令的參考解碼器（測試 / 替身韌體用），回傳 (kind, a, b, value)。"""
+
+    schema = SCHEMA_CMD
+
+    def __init__(self, capacity=4096):
+        super().__init__(capacity)
+        self._pick = self.schema.picker([n for n in self.schema.names if n != "crc"])
+
+    def _decode(self, buf, pos):
+        return self._pick(self._unpack(self.view, pos))
+
+
+def make_parser(protocol=1, capacity=4096):
+    if protocol == 2:
+        return FrameParserV2(capacity)
+    return FrameParser(capacity)
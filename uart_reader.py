@@ -0,0 +1,200 @@
+import threading
+import time
+
+from uart_protocol import FIELDS, make_parser
+
+
+class FrameCadence:
+    """用每次 read 的到達時間（host 端 perf_counter_ns）估 MCU 的送出節奏。
+
+    period   平均每筆間隔（EWMA，時間和筆數分開平均，不受一次到幾筆影響）
+    jitter   實際到達跟 period 推算的差（RFC 3550 的作法，增益 1/16）
+    burst    一次 read 收到幾筆：一直 >1 代表 USB-serial 驅動 / FIFO 在攢資料，
+             不是 MCU 送得慢
+    loop     我們自己從 read 回來到處理完的時間；這個大就是 reader 這邊拖到
+    """
+
+    def __init__(self, alpha=1 / 64):
+        self.alpha = alpha
+        self.reset()
+        self.reads = 0
+        self.frames = 0
+        self.burst_reads = 0
+        self.max_burst = 0
+
+    def reset(self):
+        """重連後重新起算（中間斷掉的時間不算進週期）。"""
+        self.last_t = None
+        self.avg_dt = 0.0
+        self.avg_n = 0.0
+        self.jitter = 0.0
+        self.loop = 0.0
+
+    def on_read(self, t_ns, n):
+        """t_ns 收到 n 筆完整 frame。"""
+        self.reads += 1
+        self.frames += n
+        if n > 1:
+            self.burst_reads += 1
+            if n > self.max_burst:
+                self.max_burst = n
+        last = self.last_t
+        self.last_t = t_ns
+        if last is None:
+            return
+        dt = t_ns - last
+        a = self.alpha
+        if not self.avg_n:
+            self.avg_dt, self.avg_n = float(dt), float(n)
+            return
+        period = self.avg_dt / self.avg_n
+        self.jitter += (abs(dt - n * period) - self.jitter) / 16
+        self.avg_dt += (dt - self.avg_dt) * a
+        self.avg_n += (n - self.avg_n) * a
+
+    def on_loop(self, ns):
+        self.loop += (ns - self.loop) * self.alpha
+
+    def stats(self):
+        period = self.avg_dt / self.avg_n if self.avg_n else 0.0
+        return {
+            "rate_hz":         1e9 / period if period else 0.0,
+            "period_ms":       period / 1e6,
+            "jitter_ms":       self.jitter / 1e6,
+            "frames_per_read": self.avg_n,
+            "burst_reads":     self.burst_reads / self.reads if self.reads else 0.0,
+            "max_burst":       self.max_burst,
+            "loop_us":         self.loop / 1e3,
+        }
+
+
+class TelemetryReader(threading.Thread):
+    """背景執行緒：持續讀來源（UART / pty / TCP / UDP / 檔案，見 telemetry_source），
+    一收到 bytes 就解碼，最新一筆放在 self.latest。
+
+    self.latest = (seq, (gear, rpm, speed, thr, brk, steer_x10))
+    整個 tuple 一次指派，讀取端不用上鎖；seq 每發布一筆就 +1，
+    render / 手把那邊比對 seq 就知道有沒有新資料。
+
+    coalesce=True：一次收到好幾筆時只解最新那筆（低延遲）。
+    on_frames：需要每一筆都留下來（例如錄製）時給一個 callback，
+    會改成逐筆解碼並呼叫 on_frames(frames, t_ns)，latest 仍然是最後一筆；
+    t_ns 是這批 bytes 讀進來的 host 時間（perf_counter_ns），同一批共用。
+    protocol=2：韌體改送 v2 封包（序號 + CRC），遺失 / 重複 / 損壞見 parser.link。
+
+    source 由這個執行緒負責 open()；打不開或讀取出錯（線被拔掉）就關掉重開，
+    等待時間從 backoff[0] 每次加倍到 backoff[1]，全部在背景，畫面完全不受影響。
+    self.connected 表示目前有沒有連上；self.latest_t 是最新一筆讀進來的 perf_counter() 時間。
+    self.cadence（FrameCadence）估 MCU 送出頻率 / 抖動 / 一次到幾筆，見 stats()。
+
+    tracer：LatencyTracer（見 latency_trace），有給才記 decode / publish 延遲，
+    並在 self.trace = (seq, 讀到 bytes 的 perf_counter_ns) 留給下游接著算。
+    """
+
+    def __init__(self, source, verbose=False, coalesce=True, on_frames=None, protocol=1,
+                 backoff=(0.1, 2.0), tracer=None):
+        super().__init__(name="uart-reader", daemon=True)
+        self.source = source
+        self.backoff = backoff
+        self.connected = False
+        self.reconnects = 0
+        self.verbose = verbose
+        self.coalesce = coalesce
+        self.on_frames = on_frames
+        self.latest = (0, None)
+        self.latest_t = 0.0
+        self.tracer = tracer
+        self.trace = (0, 0)
+        self.new_data = threading.Event()
+        self._stop_evt = threading.Event()
+        self.parser = make_parser(protocol)
+        self.cadence = FrameCadence()
+
+    def stats(self):
+        return {**self.parser.stats(), **self.cadence.stats()}
+
+    def fields_t(self, names):
+        """names 這幾個欄位最後一次更新的時間；還沒收過資料是 None（同 TelemetryMerger）。"""
+        return self.latest_t or None
+
+    def stop(self, timeout=0.5):
+        self._stop_evt.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def run(self):
+        source = self.source
+        delay = self.backoff[0]
+        while not self._stop_evt.is_set():
+            if not self.connected:
+                try:
+                    source.open()
+                except Exception as e:
+                    if delay == self.backoff[0]:
+                        print(f"[UART] {source.name} not available ({e}), retrying...")
+                    self._stop_evt.wait(delay)
+                    delay = min(delay * 2, self.backoff[1])
+                    continue
+                # 舊連線留下的半筆資料不要跟新資料接在一起
+                self.parser.reset()
+                self.cadence.reset()
+                self.connected = True
+                if self.reconnects:
+                    print(f"[UART] {source.name} reconnected")
+                delay = self.backoff[0]
+
+            try:
+                # 有多少讀多少；沒資料時最多卡 source.timeout 秒，不影響畫面
+                data = source.read()
+            except Exception as e:
+                print(f"[UART] {source.name} lost:", e)
+                self.connected = False
+                self.reconnects += 1
+                try:
+                    source.close()
+                except Exception:
+                    pass
+                continue
+            if data:
+                t_read = time.perf_counter_ns()
+                self._feed(data, t_read)
+                self.cadence.on_loop(time.perf_counter_ns() - t_read)
+
+        if self.connected:
+            source.close()
+            self.connected = False
+
+    def _feed(self, data, t_read):
+        parser = self.parser
+        if self.coalesce and self.on_frames is None:
+            skipped = parser.frames_skipped
+            frame = parser.feed_latest(data)
+            if frame is None:
+                return
+            frames = (frame,)
+            self.cadence.on_read(t_read, 1 + parser.frames_skipped - skipped)
+        else:
+            frames = parser.feed(data)
+            if not frames:
+                return
+            self.cadence.on_read(t_read, len(frames))
+            if self.on_frames is not None:
+                self.on_frames(frames, t_read)
+        tracer = self.tracer
+        if tracer is not None:
+            tracer.record("decode", t_read)
+
+        if self.verbose:
+            for frame in frames:
+                # 照欄位名稱印，layout 加通道也不用改這裡；steer_x10 換成角度
+                print("解析成功 → " + ", ".join(
+                    f"steer={v / 10.0}" if name == "steer_x10" else f"{name}={v}"
+                    for name, v in zip(FIELDS, frame)))
+
+        self.latest_t = t_read / 1e9
+        seq = self.latest[0] + 1
+        self.latest = (seq, frames[-1])
+        if tracer is not None:
+            self.trace = (seq, t_read)
+            tracer.record("publish", t_read)
+        self.new_data.set()